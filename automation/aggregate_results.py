@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Combine the results of the three test frameworks into one summary.
+
+Result files (written by run_tests.py):
+
+    python/robotframework/results/output.xml   (Robot Framework 6 and 7)
+    python/playwright/results/junit.xml        (pytest --junitxml)
+    typescript/results/junit.xml               (Playwright junit reporter)
+
+All files are read with `iterparse`: every element is removed from the tree
+as soon as it has been processed, so memory stays flat even for output.xml
+files of several hundred MB.
+
+Retried tests appear more than once in the results; the last attempt is the
+final result and earlier attempts are counted as retries.
+
+Usage:
+    python aggregate_results.py [--output results/summary.json] [--slowest N]
+    python aggregate_results.py --robot PATH --pytest PATH --typescript PATH
+"""
+
+import argparse
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RESULT_FILES = {
+    "robot": os.path.join(SCRIPT_DIR, "python", "robotframework", "results", "output.xml"),
+    "pytest": os.path.join(SCRIPT_DIR, "python", "playwright", "results", "junit.xml"),
+    "typescript": os.path.join(SCRIPT_DIR, "typescript", "results", "junit.xml"),
+}
+SUMMARY_FILE = os.path.join(SCRIPT_DIR, "results", "summary.json")
+
+DEFAULT_SLOWEST = 10
+
+# Robot Framework 6 status timestamps: <status starttime="20260214 10:30:00.123" ...>
+ROBOT_TIME_FORMAT = "%Y%m%d %H:%M:%S.%f"
+
+
+def _robot_duration(status):
+    """Duration in seconds of a Robot <status> element (RF 7 or RF 6 format)."""
+    if "elapsed" in status.attrib:
+        return float(status.get("elapsed"))
+
+    start, end = status.get("starttime"), status.get("endtime")
+    if not start or not end or start == "N/A" or end == "N/A":
+        return 0.0
+    started = datetime.strptime(start, ROBOT_TIME_FORMAT)
+    ended = datetime.strptime(end, ROBOT_TIME_FORMAT)
+    return (ended - started).total_seconds()
+
+
+def parse_robot_output(path):
+    """Yield test results from a Robot Framework output.xml."""
+    suites = []
+    stack = []
+    test = None
+
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "suite":
+                suites.append(elem.get("name"))
+            elif elem.tag == "test":
+                test = {"suite": ".".join(suites), "name": elem.get("name")}
+            continue
+
+        stack.pop()
+        if elem.tag == "suite":
+            suites.pop()
+        elif elem.tag == "status" and test is not None and stack and stack[-1].tag == "test":
+            test["status"] = elem.get("status")
+            test["duration"] = _robot_duration(elem)
+            test["message"] = (elem.text or "").strip() or None
+        elif elem.tag == "test":
+            yield {
+                "framework": "robot",
+                "browser": None,
+                "suite": test["suite"],
+                "name": test["name"],
+                "status": test.get("status", "FAIL"),
+                "duration": test.get("duration", 0.0),
+                "message": test.get("message"),
+            }
+            test = None
+
+        # Drop everything already processed (keywords, messages, tests)
+        if stack:
+            stack[-1].remove(elem)
+
+
+def parse_junit(path, framework):
+    """Yield test results from a JUnit XML file (pytest or Playwright)."""
+    stack = []
+    suite = None
+
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "testsuite":
+                suite = elem
+            continue
+
+        stack.pop()
+        if elem.tag == "testcase":
+            status, message = "PASS", None
+            for child in elem:
+                if child.tag in ("failure", "error"):
+                    status, message = "FAIL", child.get("message") or (child.text or "").strip()[:2000]
+                elif child.tag == "skipped":
+                    status, message = "SKIP", child.get("message")
+
+            # Playwright puts the project (browser) in the suite's hostname,
+            # pytest-playwright in the test id: test_add_new_todo[chromium]
+            name = elem.get("name")
+            browser = None
+            if framework == "typescript" and suite is not None:
+                browser = suite.get("hostname")
+            elif name.endswith("]") and "[" in name:
+                browser = name[name.index("[") + 1:-1]
+            yield {
+                "framework": framework,
+                "browser": browser or None,
+                "suite": elem.get("classname") or (suite.get("name") if suite is not None else ""),
+                "name": name,
+                "status": status,
+                "duration": float(elem.get("time") or 0),
+                "message": message,
+            }
+
+            # Drop the processed test case (with its failure/output children)
+            stack[-1].remove(elem)
+
+
+def parse_results(framework, path):
+    """Yield the test results of one framework's result file."""
+    if framework == "robot":
+        return parse_robot_output(path)
+    return parse_junit(path, framework)
+
+
+def aggregate(result_files=None, slowest=DEFAULT_SLOWEST):
+    """Build the combined summary for the given {framework: path} files."""
+    result_files = result_files or RESULT_FILES
+    sources = {}
+    results = []
+
+    for framework, path in result_files.items():
+        if not path or not os.path.exists(path):
+            continue
+        sources[framework] = {
+            "path": path,
+            "modified": datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds"),
+        }
+        results.append(parse_results(framework, path))
+
+    return summarize((result for parsed in results for result in parsed), sources, slowest)
+
+
+def summarize(results, sources=None, slowest=DEFAULT_SLOWEST):
+    """Build the combined summary from test results in run order."""
+    tests = {}
+    for result in results:
+        key = (result["framework"], result["browser"], result["suite"], result["name"])
+        previous = tests.get(key)
+        result["attempts"] = previous["attempts"] + 1 if previous else 1
+        tests[key] = result
+
+    frameworks = {}
+    for test in tests.values():
+        stats = frameworks.setdefault(test["framework"], {
+            "total": 0, "passed": 0, "failed": 0, "skipped": 0, "flaky": 0, "duration": 0.0,
+        })
+        stats["total"] += 1
+        stats["duration"] += test["duration"]
+        if test["status"] == "PASS":
+            stats["passed"] += 1
+            if test["attempts"] > 1:
+                stats["flaky"] += 1
+        elif test["status"] == "SKIP":
+            stats["skipped"] += 1
+        else:
+            stats["failed"] += 1
+
+    totals = {"total": 0, "passed": 0, "failed": 0, "skipped": 0, "flaky": 0, "duration": 0.0}
+    for stats in frameworks.values():
+        stats["duration"] = round(stats["duration"], 3)
+        for name in totals:
+            totals[name] += stats[name]
+    totals["duration"] = round(totals["duration"], 3)
+
+    ordered = sorted(tests.values(), key=lambda test: test["duration"], reverse=True)
+    return {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "sources": sources or {},
+        "totals": totals,
+        "frameworks": frameworks,
+        "slowest": ordered[:slowest],
+        "tests": ordered,
+    }
+
+
+def write_summary(summary, path=SUMMARY_FILE):
+    """Write the summary as JSON."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return path
+
+
+def print_summary(summary):
+    """Print per-framework totals and the slowest tests."""
+    if not summary["frameworks"]:
+        print("\nNo test results found")
+        return
+
+    print("\n=== Combined Results ===")
+    print(f"{'Framework':<12} {'Total':>6} {'Passed':>7} {'Failed':>7} {'Skipped':>8} {'Flaky':>6} {'Time':>9}")
+    for framework, stats in list(summary["frameworks"].items()) + [("all", summary["totals"])]:
+        print(f"{framework:<12} {stats['total']:>6} {stats['passed']:>7} {stats['failed']:>7} "
+              f"{stats['skipped']:>8} {stats['flaky']:>6} {stats['duration']:>8.1f}s")
+
+    if summary["slowest"]:
+        print("\nSlowest tests:")
+        for test in summary["slowest"]:
+            browser = f" [{test['browser']}]" if test["browser"] and not test["name"].endswith("]") else ""
+            print(f"  {test['duration']:>7.2f}s  {test['framework']:<10} {test['status']:<4}  "
+                  f"{test['name']}{browser}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Combine Robot, pytest and Playwright results.")
+    parser.add_argument("--robot", default=RESULT_FILES["robot"], help="Robot Framework output.xml")
+    parser.add_argument("--pytest", default=RESULT_FILES["pytest"], help="pytest JUnit XML")
+    parser.add_argument("--typescript", default=RESULT_FILES["typescript"], help="Playwright JUnit XML")
+    parser.add_argument("--output", default=SUMMARY_FILE, help="Summary JSON file")
+    parser.add_argument("--slowest", type=int, default=DEFAULT_SLOWEST)
+    args = parser.parse_args(argv)
+
+    summary = aggregate({"robot": args.robot, "pytest": args.pytest, "typescript": args.typescript},
+                        args.slowest)
+    print_summary(summary)
+    if summary["frameworks"]:
+        print(f"\nSummary: {write_summary(summary, args.output)}")
+    return 1 if summary["totals"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
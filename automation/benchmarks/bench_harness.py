@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the test harness overhead (not the app under test).
+
+Times the screenshot/bookkeeping paths of CustomKeywordsLibrary and the
+pytest conftest against a local static HTML page and a synthetic
+test-output tree, fully offline:
+
+    - get_test_run_id: run-number scan of a test-output folder with --runs runs
+    - get_test_index: parsing the .robot file for the test position
+    - step counters, _test_output_dir and relpath
+    - screenshot HTML logged in a real robot.run (per message, empty run subtracted)
+    - page.screenshot alone vs. the full _screenshot (settle wait patched out)
+      and take_screenshot paths
+    - the pytest index.html report (directory walk and run history)
+    - retention.list_runs over the same tree
+
+Usage:
+    python bench_harness.py                                # print timings
+    python bench_harness.py --save-baseline baseline.json  # record a baseline
+    python bench_harness.py --baseline baseline.json       # exit 1 on regression
+    python bench_harness.py --only get_test_run_id --runs 5000
+
+Benchmarks whose dependencies (robot, playwright, pytest, a Playwright
+Chromium) are missing are reported as skipped.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AUTOMATION_DIR = os.path.dirname(SCRIPT_DIR)
+ROBOT_DIR = os.path.join(AUTOMATION_DIR, "python", "robotframework")
+PYTEST_DIR = os.path.join(AUTOMATION_DIR, "python", "playwright")
+ROBOT_SUITE = os.path.join(ROBOT_DIR, "tests", "web", "todo_tests.robot")
+
+DEFAULT_THRESHOLD = 0.25  # Allowed median slowdown vs. baseline (25%)
+
+STATIC_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>Todo App</title></head>
+<body>
+  <h1 data-testid="todos-title">My Todos</h1>
+  <input placeholder="What needs to be done?" data-testid="new-todo-input">
+  <ul data-testid="todo-list">
+    {items}
+  </ul>
+</body></html>
+"""
+
+
+class BenchRunner:
+    """Runs benchmarks and collects timing statistics."""
+
+    def __init__(self, only=None, scale=1.0):
+        self.only = only
+        self.scale = scale
+        self.results = {}
+        self.skipped = {}
+
+    def wanted(self, name):
+        return not self.only or any(part in name for part in self.only)
+
+    def run(self, name, func, number=100, rounds=20, baseline=None, calls=1):
+        """Time func; per-call seconds for each of `rounds` rounds of `number` calls.
+
+        baseline is an optional func timed the same way in every round and
+        subtracted (fixed cost around the measured work); calls is the number
+        of measured operations inside one func call.
+        """
+        if not self.wanted(name):
+            return
+        number = max(1, int(number * self.scale))
+
+        func()  # Warm up caches and lazy imports
+        if baseline:
+            baseline()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            times = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for _ in range(number):
+                    func()
+                elapsed = time.perf_counter() - start
+                if baseline:
+                    start = time.perf_counter()
+                    for _ in range(number):
+                        baseline()
+                    elapsed -= time.perf_counter() - start
+                times.append(max(elapsed, 0.0) / (number * calls))
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        times.sort()
+        self.results[name] = {
+            "median": statistics.median(times),
+            "min": times[0],
+            "p95": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "rounds": rounds,
+            "number": number,
+        }
+        print(f"  {name:<40} {_format_time(self.results[name]['median']):>10}")
+
+    def skip(self, group, reason):
+        self.skipped[group] = reason
+        print(f"  {group:<40} skipped ({reason})")
+
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def quiet(func):
+    """Wrap func so its console output does not flood the benchmark table."""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    return wrapper
+
+
+def build_output_tree(root, runs, tests=20, steps=8):
+    """Create a synthetic test-output tree.
+
+    `runs` Robot-style run folders (only the newest is populated) plus one
+    pytest run folder with `tests` test folders of `steps` screenshots each.
+    """
+    output_dir = os.path.join(root, "test-output")
+    for number in range(1, runs + 1):
+        day, rest = divmod(number, 86400)
+        name = f"2026-01-{day % 28 + 1:02d}_{rest // 3600:02d}-{rest // 60 % 60:02d}-{rest % 60:02d}_Run_{number:03d}"
+        os.makedirs(os.path.join(output_dir, name))
+
+    pytest_run = os.path.join(output_dir, "Run_2026-01-01_00-00-00")
+    png = b"\x89PNG\r\n\x1a\n" + b"\0" * 256
+    for test in range(tests):
+        test_dir = os.path.join(pytest_run, f"test_case_{test:03d}[chromium]")
+        os.makedirs(test_dir)
+        for step in range(1, steps + 1):
+            with open(os.path.join(test_dir, f"{step:02d}_step.png"), "wb") as f:
+                f.write(png)
+    return output_dir, pytest_run
+
+
+class _BenchBuiltIn:
+    """Stand-in for robot's BuiltIn outside a running suite."""
+
+    variables = {
+        "${TEST NAME}": "Switch Between Filters",
+        "${SUITE SOURCE}": ROBOT_SUITE,
+        "${BROWSER}": "chromium",
+        "${HEADLESS}": True,
+    }
+
+    def get_variable_value(self, name, default=None):
+        return self.variables.get(name, default)
+
+    def log(self, message, level="INFO", html=False):
+        pass
+
+
+def bench_retention(runner, workdir):
+    sys.path.insert(0, AUTOMATION_DIR)
+    import retention
+
+    output_dir = os.path.join(workdir, "test-output")
+    runner.run("retention.list_runs", lambda: retention.list_runs(output_dir), number=5, rounds=10)
+
+
+def bench_robot(runner, workdir, page_url):
+    try:
+        sys.path.insert(0, ROBOT_DIR)
+        from libraries import CustomKeywordsLibrary as lib_module
+    except ImportError as e:
+        runner.skip("robot library", str(e))
+        return
+
+    lib_module.BuiltIn = _BenchBuiltIn
+
+    def run_id_scan():
+        lib_module._global_test_run_id = None
+        lib_module.get_test_run_id()
+
+    runner.run("robot.get_test_run_id", run_id_scan, number=5, rounds=15)
+    runner.run("robot.get_test_index", lambda: lib_module.get_test_index("Switch Between Filters"),
+               number=200, rounds=20)
+
+    library = lib_module.CustomKeywordsLibrary()
+    runner.run("robot._increment_step", lambda: library._increment_step("Switch Between Filters"),
+               number=10000, rounds=20)
+    runner.run("robot._test_output_dir", lambda: library._test_output_dir("Switch Between Filters"),
+               number=500, rounds=20)
+
+    filepath = library._test_output_dir("Switch Between Filters") + os.sep + "01_page_loaded.png"
+    runner.run("robot.relpath", lambda: os.path.relpath(filepath, os.getcwd()), number=5000, rounds=20)
+
+    bench_robot_logging(runner, workdir)
+
+    if page_url is None:
+        return
+    try:
+        page = library._get_page()
+    except Exception as e:
+        runner.skip("robot browser", str(e).splitlines()[0])
+        return
+
+    try:
+        page.goto(page_url)
+        screenshot_path = os.path.join(workdir, "raw.png")
+        runner.run("browser.page_screenshot", lambda: page.screenshot(path=screenshot_path, full_page=True),
+                   number=5, rounds=10)
+        # The fixed settle wait before each screenshot would hide the harness overhead
+        page.wait_for_timeout = lambda timeout: None
+        runner.run("robot._screenshot", lambda: library._screenshot("page_loaded"), number=1, rounds=10)
+    finally:
+        library.close_browser()
+
+
+LOG_SUITE = """*** Settings ***
+Library    bench_log_library.py
+
+*** Test Cases ***
+Embed Screenshots
+    Embed Screenshots    ${COUNT}    ${OUTPUT DIR}
+"""
+
+LOG_LIBRARY = """from robot.libraries.BuiltIn import BuiltIn
+from libraries.CustomKeywordsLibrary import screenshot_html
+
+
+def embed_screenshots(count, path):
+    for step in range(1, int(count) + 1):
+        BuiltIn().log(screenshot_html(f"{path}/{step:02d}_step.png"), "HTML")
+"""
+
+LOG_MESSAGES = 500
+
+
+def bench_robot_logging(runner, workdir):
+    """Screenshot HTML logged inside a real robot.run (output.xml and log.html)."""
+    import robot
+
+    log_dir = os.path.join(workdir, "robot-log")
+    os.makedirs(log_dir)
+    suite = os.path.join(log_dir, "log_bench.robot")
+    with open(suite, "w", encoding="utf-8") as f:
+        f.write(LOG_SUITE)
+    with open(os.path.join(log_dir, "bench_log_library.py"), "w", encoding="utf-8") as f:
+        f.write(LOG_LIBRARY)
+
+    def run_suite(count):
+        robot.run(suite, pythonpath=[ROBOT_DIR, log_dir], variable=[f"COUNT:{count}"],
+                  outputdir=os.path.join(log_dir, "results"), report="NONE",
+                  stdout=io.StringIO(), stderr=io.StringIO())
+
+    # The run with no messages is subtracted: suite parsing, setup and empty output
+    runner.run("robot.run_html_log_embedding", lambda: run_suite(LOG_MESSAGES), number=1, rounds=5,
+               baseline=lambda: run_suite(0), calls=LOG_MESSAGES)
+
+
+def bench_pytest(runner, workdir, pytest_run, page_url):
+    try:
+        sys.path.insert(0, PYTEST_DIR)
+        import conftest
+        from pathlib import Path
+    except ImportError as e:
+        runner.skip("pytest conftest", str(e))
+        return
+
+    conftest.TEST_OUTPUT_DIR = Path(pytest_run)
+    conftest.HISTORY = None
+    runner.run("pytest.report_from_directories", quiet(lambda: conftest.pytest_sessionfinish(None, 0)),
+               number=3, rounds=10)
+
+    import run_history
+    history = run_history.RunHistory(os.path.join(workdir, "history.db"))
+    run_id = conftest.TEST_OUTPUT_DIR.name
+    history.start_run(run_id, "pytest")
+    for test_dir in sorted(conftest.TEST_OUTPUT_DIR.iterdir()):
+        if not test_dir.is_dir():
+            continue
+        test_id = history.start_test(run_id, "test_todo_app.py", test_dir.name, "chromium")
+        for step, png in enumerate(sorted(test_dir.glob("*.png")), 1):
+            history.add_step(test_id, step, png.stem, str(png), 0.1)
+        history.finish_test(test_id, "PASS", 1.0)
+    conftest.HISTORY = history
+    runner.run("pytest.report_from_history", quiet(lambda: conftest.pytest_sessionfinish(None, 0)),
+               number=3, rounds=10)
+    conftest.HISTORY = None
+    history.close()
+
+    if page_url is None:
+        return
+    try:
+        from playwright.sync_api import sync_playwright
+        playwright = sync_playwright().start()
+        browser = playwright.chromium.launch(headless=True)
+    except Exception as e:
+        runner.skip("pytest browser", str(e).splitlines()[0])
+        return
+
+    try:
+        page = browser.new_page(viewport={"width": 1280, "height": 720})
+        page.goto(page_url)
+        test_dir = Path(workdir) / "pytest-screens"
+        test_dir.mkdir()
+        take_screenshot = conftest.make_screenshot_taker(page, test_dir, "bench::test")
+        runner.run("pytest.take_screenshot", quiet(lambda: take_screenshot("step")), number=5, rounds=10)
+    finally:
+        browser.close()
+        playwright.stop()
+
+
+def compare(results, baseline, threshold):
+    """Print deltas against the baseline; return the regressed benchmark names."""
+    regressions = []
+    print(f"\n{'Benchmark':<40} {'Baseline':>10} {'Current':>10} {'Delta':>8}")
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            print(f"{name:<40} {'-':>10} {_format_time(result['median']):>10}      new")
+            continue
+        base = baseline[name]["median"]
+        delta = (result["median"] - base) / base if base else 0.0
+        flag = ""
+        if delta > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40} {_format_time(base):>10} {_format_time(result['median']):>10} {delta:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the test harness overhead.")
+    parser.add_argument("--runs", type=int, default=2000, help="Run folders in the synthetic test-output tree")
+    parser.add_argument("--tests", type=int, default=200, help="Test folders in the synthetic pytest run")
+    parser.add_argument("--only", action="append", help="Run benchmarks whose name contains this text")
+    parser.add_argument("--no-browser", action="store_true", help="Skip benchmarks that launch Chromium")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply iterations per round")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed median slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="Write results as a new baseline JSON")
+    args = parser.parse_args(argv)
+
+    # Keep benchmark runs out of the real run history
+    os.environ["TEST_HISTORY"] = "0"
+
+    workdir = tempfile.mkdtemp(prefix="harness-bench-")
+    cwd = os.getcwd()
+    runner = BenchRunner(args.only, args.scale)
+    try:
+        print(f"Building synthetic test-output ({args.runs} runs, {args.tests} tests)...")
+        _, pytest_run = build_output_tree(workdir, args.runs, args.tests)
+
+        page_url = None
+        if not args.no_browser:
+            page_path = os.path.join(workdir, "todos.html")
+            items = "\n    ".join(f'<li data-testid="todo-item-{i}">Todo {i}</li>' for i in range(50))
+            with open(page_path, "w", encoding="utf-8") as f:
+                f.write(STATIC_PAGE.format(items=items))
+            page_url = "file://" + page_path
+
+        os.chdir(workdir)
+        print("\nBenchmarks (median per call):")
+        bench_retention(runner, workdir)
+        bench_robot(runner, workdir, page_url)
+        bench_pytest(runner, workdir, pytest_run, page_url)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(runner.results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(runner.results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Warm browsers kept running across test runs of watch_daemon.py.
+
+Robot Framework runs in the daemon process, which sets WARM_BROWSER=1: the
+library then takes its browser from this pool instead of launching one,
+and gives it back (with its contexts closed) instead of closing it.
+
+pytest runs in a subprocess per change: the daemon launches a pooled
+Chromium with remote debugging and passes its CDP endpoint in
+WARM_BROWSER_CDP; the conftest attaches to it with connect_over_cdp.
+
+The Playwright driver and the browsers live until the daemon exits.
+Without WARM_BROWSER / WARM_BROWSER_CDP the pool is never used.
+"""
+
+import json
+import os
+import socket
+
+CDP_ENDPOINT_ENV = "WARM_BROWSER_CDP"
+
+_playwright = None
+_browsers = {}  # (browser name, launch args) -> Browser
+_state = {}  # same key -> dict living as long as the browser (e.g. its watchdog)
+_cdp_endpoints = {}  # same key -> CDP endpoint URL of a remote-debugging Chromium
+
+
+def enabled():
+    """Check whether browsers should be taken from the pool."""
+    return os.environ.get("WARM_BROWSER", "").lower() in ("1", "true", "yes")
+
+
+def get_playwright():
+    """Get the shared Playwright driver, starting it on first use."""
+    global _playwright
+    if _playwright is None:
+        from playwright.sync_api import sync_playwright
+        _playwright = sync_playwright().start()
+    return _playwright
+
+
+def _key(name, launch_args):
+    return (name, json.dumps(launch_args or {}, sort_keys=True, default=str))
+
+
+def get_browser(name="chromium", launch_args=None, on_launch=None):
+    """Get a running browser for these launch settings, launching it if needed.
+
+    on_launch is called with the browser when a new one had to be launched.
+    """
+    launch_args = launch_args or {}
+    key = _key(name, launch_args)
+    browser = _browsers.get(key)
+    if browser is None or not browser.is_connected():
+        browser = getattr(get_playwright(), name).launch(**launch_args)
+        _browsers[key] = browser
+        _state[key] = {}
+        if on_launch:
+            on_launch(browser)
+    return browser
+
+
+def get_cdp_endpoint(launch_args=None):
+    """CDP endpoint of a pooled Chromium for other processes, launching it if needed."""
+    launch_args = launch_args or {}
+    key = _key("chromium-cdp", launch_args)
+    browser = _browsers.get(key)
+    if browser is None or not browser.is_connected():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        args = [*launch_args.get("args", []), f"--remote-debugging-port={port}"]
+        browser = get_playwright().chromium.launch(**{**launch_args, "args": args})
+        _browsers[key] = browser
+        _state[key] = {}
+        _cdp_endpoints[key] = f"http://127.0.0.1:{port}"
+    return _cdp_endpoints[key]
+
+
+def is_pooled(browser):
+    return any(pooled is browser for pooled in _browsers.values())
+
+
+def state(browser):
+    """Dict kept with a pooled browser (None for other browsers)."""
+    for key, pooled in _browsers.items():
+        if pooled is browser:
+            return _state.setdefault(key, {})
+    return None
+
+
+def release(browser):
+    """Give a browser back to the pool: close its contexts, keep it running."""
+    for context in list(browser.contexts):
+        try:
+            context.close()
+        except Exception:
+            pass
+
+
+def discard(browser):
+    """Remove a browser from the pool (the caller closes it)."""
+    for key, pooled in list(_browsers.items()):
+        if pooled is browser:
+            del _browsers[key]
+            _state.pop(key, None)
+            _cdp_endpoints.pop(key, None)
+
+
+def close_all():
+    """Close every pooled browser and stop the driver."""
+    global _playwright
+    for browser in _browsers.values():
+        try:
+            browser.close()
+        except Exception:
+            pass
+    _browsers.clear()
+    _state.clear()
+    _cdp_endpoints.clear()
+    if _playwright is not None:
+        _playwright.stop()
+        _playwright = None
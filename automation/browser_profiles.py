@@ -0,0 +1,93 @@
+"""Browser launch and context profiles shared by Robot Framework and pytest.
+
+    default  - headed or headless as requested, 1280x720, everything loaded,
+               full-page screenshots (use for visual runs)
+    fast     - headless Chromium with tuned flags, images/media/fonts and
+               analytics requests blocked, reduced motion, 800x600 viewport,
+               viewport-only screenshots (functional runs)
+
+The profile is selected with the BROWSER_PROFILE environment variable
+(Robot Framework also accepts `-v BROWSER_PROFILE:fast`).
+"""
+
+import os
+import re
+
+PROFILES = ("default", "fast")
+DEFAULT_PROFILE = "default"
+
+DEFAULT_VIEWPORT = {"width": 1280, "height": 720}
+FAST_VIEWPORT = {"width": 800, "height": 600}
+
+# Chromium flags that cut GPU, compositing and background work in headless runs
+FAST_CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--blink-settings=imagesEnabled=false",
+    "--mute-audio",
+]
+
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+BLOCKED_URL_PATTERN = re.compile(
+    r"google-analytics\.com|googletagmanager\.com|doubleclick\.net|segment\.(io|com)"
+    r"|hotjar\.com|mixpanel\.com|sentry\.io|fonts\.googleapis\.com|fonts\.gstatic\.com"
+)
+
+
+def get_profile(name=None):
+    """Resolve the profile name (argument, then BROWSER_PROFILE, then default)."""
+    name = (name or os.environ.get("BROWSER_PROFILE") or DEFAULT_PROFILE).strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown browser profile '{name}' (expected one of: {', '.join(PROFILES)})")
+    return name
+
+
+def launch_args(profile, browser_name="chromium"):
+    """Extra keyword arguments for browser_type.launch()."""
+    if profile != "fast":
+        return {}
+
+    args = {"headless": True}
+    if browser_name == "chromium":
+        args["args"] = FAST_CHROMIUM_ARGS
+    return args
+
+
+def context_args(profile):
+    """Keyword arguments for browser.new_context()."""
+    if profile != "fast":
+        return {"viewport": DEFAULT_VIEWPORT}
+
+    return {
+        "viewport": FAST_VIEWPORT,
+        "reduced_motion": "reduce",
+        "service_workers": "block",
+    }
+
+
+def full_page_screenshots(profile):
+    """Whether step screenshots capture the full page or just the viewport."""
+    return profile != "fast"
+
+
+def should_block(request):
+    """Check whether the fast profile drops this request."""
+    return (request.resource_type in BLOCKED_RESOURCE_TYPES
+            or BLOCKED_URL_PATTERN.search(request.url) is not None)
+
+
+def install_route_filter(context, profile):
+    """Block heavy and third-party requests on a context (fast profile only)."""
+    if profile != "fast":
+        return
+
+    def handle(route):
+        if should_block(route.request):
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", handle)
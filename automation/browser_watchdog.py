@@ -0,0 +1,131 @@
+"""Memory watchdog for long-running browser sessions.
+
+Tracks the resident memory (RSS) of the Playwright driver and browser
+processes (all child processes of the test process) plus the number of open
+contexts and pages, appends samples to `memory.csv` in the run's output
+folder, and decides when the browser should be recycled.
+
+Uses psutil when installed, /proc on Linux otherwise; elsewhere memory is
+reported as unknown and only the test-count limit applies.
+"""
+
+import csv
+import os
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_MAX_TESTS = 50
+DEFAULT_MAX_RSS_MB = 1024
+
+CSV_FIELDS = ["time", "test", "event", "rss_mb", "processes", "contexts", "pages", "tests_since_launch"]
+
+
+def _proc_children():
+    """Map of parent pid -> child pids from /proc (Linux)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # Fields after the command name, which may contain spaces
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+    except OSError:
+        return 0
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def child_processes_rss(pid=None):
+    """Total RSS in bytes and count of all descendants of pid.
+
+    Returns (None, 0) when memory cannot be measured on this platform.
+    """
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            descendants = psutil.Process(pid).children(recursive=True)
+        except psutil.Error:
+            return None, 0
+        total = 0
+        for process in descendants:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total, len(descendants)
+
+    if not os.path.isdir("/proc"):
+        return None, 0
+
+    children = _proc_children()
+    descendants = []
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        descendants.append(child)
+        pending.extend(children.get(child, []))
+    return sum(_proc_rss(child) for child in descendants), len(descendants)
+
+
+class BrowserWatchdog:
+    """Decides when to recycle a browser and logs memory samples."""
+
+    def __init__(self, max_tests=DEFAULT_MAX_TESTS, max_rss_mb=DEFAULT_MAX_RSS_MB):
+        self.max_tests = max_tests
+        self.max_rss_mb = max_rss_mb
+        self.tests_since_launch = 0
+
+    def browser_launched(self):
+        self.tests_since_launch = 0
+
+    def test_finished(self):
+        self.tests_since_launch += 1
+
+    def sample(self, browser=None):
+        """Measure driver/browser memory and open contexts/pages."""
+        rss, processes = child_processes_rss()
+        contexts = browser.contexts if browser is not None else []
+        return {
+            "rss_mb": round(rss / (1024 * 1024), 1) if rss is not None else None,
+            "processes": processes,
+            "contexts": len(contexts),
+            "pages": sum(len(context.pages) for context in contexts),
+            "tests_since_launch": self.tests_since_launch,
+        }
+
+    def recycle_reason(self, sample):
+        """Why the browser should be recycled now, or None."""
+        if self.max_tests and self.tests_since_launch >= self.max_tests:
+            return f"{self.tests_since_launch} tests since launch"
+        if self.max_rss_mb and sample["rss_mb"] is not None and sample["rss_mb"] > self.max_rss_mb:
+            return f"{sample['rss_mb']} MB > {self.max_rss_mb} MB"
+        return None
+
+    def log(self, path, test, event, sample):
+        """Append a sample to the memory CSV."""
+        new_file = not os.path.exists(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow({
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "test": test,
+                "event": event,
+                **sample,
+            })
@@ -0,0 +1,166 @@
+"""Chromium runtime metrics recorded around test steps (CDP Performance domain).
+
+Shared by the Robot Framework library and the pytest fixtures. Each step
+records the change of a few Performance.getMetrics counters between the
+start of the action and the moment the page has settled after it; the
+per-test records and their summary are written to metrics.json next to the
+step screenshots.
+
+CDP sessions are only available on Chromium; without one every recorder
+call is a no-op.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+
+PERFORMANCE_METRICS = ("JSHeapUsedSize", "LayoutCount", "RecalcStyleCount", "ScriptDuration")
+
+# Post-action wait used by the test steps before their screenshots
+SETTLE_MS = 500
+
+
+def open_session(context, page):
+    """Start a CDP session with the Performance domain enabled."""
+    cdp_session = context.new_cdp_session(page)
+    cdp_session.send("Performance.enable")
+    return cdp_session
+
+
+def settle(page, ms=SETTLE_MS):
+    """Wait for the page to finish re-rendering after an action."""
+    page.wait_for_load_state("domcontentloaded")
+    page.wait_for_timeout(ms)
+
+
+def format_deltas(deltas):
+    """One-line description of a set of metric deltas."""
+    return (
+        f"heap {deltas['JSHeapUsedSize'] / 1024:+.1f} KB, "
+        f"layouts {deltas['LayoutCount']:+.0f}, "
+        f"style recalcs {deltas['RecalcStyleCount']:+.0f}, "
+        f"script {deltas['ScriptDuration'] * 1000:+.1f} ms"
+    )
+
+
+class MetricsRecorder:
+    """Records CDP metric deltas per test step.
+
+    settle is an optional callable run after the action and before the
+    closing sample (pytest steps wrap only the click, so the re-render
+    happens after the block). step_number is an optional callable giving
+    the number stored with each record (the Robot library uses its
+    screenshot step counter).
+    """
+
+    def __init__(self, cdp_session=None, test_name=None, browser=None, settle=None, step_number=None):
+        self.cdp_session = cdp_session
+        self.test_name = test_name
+        self.browser = browser
+        self.settle = settle
+        self.step_number = step_number
+        self.records = []
+        self._excluded = None
+
+    def reset(self, test_name=None):
+        """Start recording a new test."""
+        self.test_name = test_name
+        self.records = []
+
+    def sample(self):
+        """Read the current CDP performance metrics."""
+        result = self.cdp_session.send("Performance.getMetrics")
+        return {
+            metric["name"]: metric["value"]
+            for metric in result["metrics"]
+            if metric["name"] in PERFORMANCE_METRICS
+        }
+
+    @contextmanager
+    def step(self, action, target=None):
+        """Measure the metric deltas of the wrapped action."""
+        if self.cdp_session is None:
+            yield
+            return
+
+        self._excluded = dict.fromkeys(PERFORMANCE_METRICS, 0)
+        before = self.sample()
+        try:
+            yield
+            if self.settle:
+                self.settle()
+        finally:
+            after = self.sample()
+            excluded = self._excluded
+            self._excluded = None
+            self.records.append({
+                "step": self.step_number() if self.step_number else len(self.records) + 1,
+                "action": action,
+                "target": target,
+                "deltas": {
+                    name: after.get(name, 0) - before.get(name, 0) - excluded[name]
+                    for name in PERFORMANCE_METRICS
+                },
+            })
+
+    @contextmanager
+    def exclude(self):
+        """Keep the wrapped work (screenshots) out of the current step's metrics."""
+        if self._excluded is None:
+            yield
+            return
+
+        before = self.sample()
+        try:
+            yield
+        finally:
+            after = self.sample()
+            for name in PERFORMANCE_METRICS:
+                self._excluded[name] += after.get(name, 0) - before.get(name, 0)
+
+    def summary(self):
+        """Total and worst-step metric deltas for the current test."""
+        summary = {}
+        for name in PERFORMANCE_METRICS:
+            values = [record["deltas"][name] for record in self.records]
+            worst = max(self.records, key=lambda record: record["deltas"][name])
+            summary[name] = {
+                "total": sum(values),
+                "max": max(values),
+                "max_action": worst["action"],
+            }
+        return summary
+
+    def totals(self):
+        """Summed deltas of all steps."""
+        return {name: values["total"] for name, values in self.summary().items()}
+
+    def write(self, test_dir):
+        """Write metrics.json to the test folder (nothing without records)."""
+        if not self.records:
+            return None
+
+        os.makedirs(test_dir, exist_ok=True)
+        report = {"test": self.test_name}
+        if self.browser:
+            report["browser"] = self.browser
+        report["steps"] = self.records
+        report["summary"] = self.summary()
+
+        path = os.path.join(test_dir, "metrics.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+    def html_summary(self):
+        """Summary table for HTML logs."""
+        rows = "".join(
+            f"<tr><td>{name}</td><td>{values['total']:.3f}</td>"
+            f"<td>{values['max']:.3f}</td><td>{values['max_action']}</td></tr>"
+            for name, values in self.summary().items()
+        )
+        return (
+            '<table border="1" cellpadding="4">'
+            "<tr><th>Metric</th><th>Total</th><th>Worst step</th><th>Action</th></tr>"
+            f"{rows}</table>"
+        )
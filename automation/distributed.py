@@ -0,0 +1,548 @@
+"""Distributed test runs: a coordinator hands out tests to worker processes.
+
+The coordinator (`run_tests.py --coordinator`) collects the Robot Framework
+test cases and pytest test functions and serves them over HTTP:
+
+    POST /lease       {"worker"}           -> {"lease", "item", "run_id", "url"},
+                                              {"wait": seconds} or {"done": true}
+    POST /heartbeat   {"lease"}            -> 200, or 410 if the lease expired
+    POST /artifacts?lease=TOKEN  <zip>     -> 200 / 410
+    POST /result      {"lease", "tests"}   -> 200 / 410
+
+Workers (`run_tests.py --worker HOST:PORT`) pull one test at a time, so fast
+workers take more tests. Each test runs in a subprocess (robot --test /
+pytest node id) with the shared TEST_RUN_ID, so screenshots land in the same
+run folder layout as a local run. The worker zips the test's output and
+posts it back; the coordinator unpacks it into its own test-output folder
+and records the results in the run history.
+
+A lease that gets no heartbeat for LEASE_TIMEOUT seconds (dead worker) is put
+back at the front of the queue, up to MAX_ATTEMPTS times. A lease does not
+expire while its artifacts are being unpacked, so a requeued test never
+gets output from the worker that lost it.
+
+The coordinator listens on 127.0.0.1 unless --bind says otherwise. Beyond
+loopback it requires a shared token (COORDINATOR_TOKEN or --token), which
+workers send in the X-Coordinator-Token header of every request.
+
+Once all tests have results the coordinator writes the pytest run's
+index.html (the workers' own index files only cover their single test).
+
+Workers need the same checkout as the coordinator (tests are addressed by
+path relative to the framework folder) and their framework venvs.
+"""
+
+import hmac
+import io
+import ipaddress
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+import zipfile
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aggregate_results
+import browser_profiles
+import retention
+import run_history
+import run_report
+import visual_diff
+import watch_daemon
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FRAMEWORK_DIRS = {
+    "robot": os.path.join(SCRIPT_DIR, "python", "robotframework"),
+    "pytest": os.path.join(SCRIPT_DIR, "python", "playwright"),
+}
+
+DEFAULT_PORT = 8765
+DEFAULT_BIND = f"127.0.0.1:{DEFAULT_PORT}"
+TOKEN_ENV = "COORDINATOR_TOKEN"
+TOKEN_HEADER = "X-Coordinator-Token"
+LEASE_TIMEOUT = 30.0
+HEARTBEAT_INTERVAL = 5.0
+MAX_ATTEMPTS = 3
+TEST_TIMEOUT = 600
+POLL_INTERVAL = 1.0
+
+# Written by every worker: appended instead of overwritten when unpacking
+APPENDED_ARTIFACTS = ("failures.txt", "memory.csv")
+# Appended CSVs keep the header of their first chunk only
+CSV_ARTIFACTS = ("memory.csv",)
+# Per-worker reports that would overwrite each other
+SKIPPED_ARTIFACTS = ("index.html",)
+
+
+def collect_items(frameworks):
+    """List the tests to distribute: one item per Robot test case or pytest test."""
+    items = []
+    if "robot" in frameworks:
+        tests_dir = os.path.join(FRAMEWORK_DIRS["robot"], "tests")
+        for root, dirs, files in os.walk(tests_dir):
+            dirs.sort()
+            for filename in sorted(files):
+                if not filename.endswith(".robot"):
+                    continue
+                path = os.path.join(root, filename)
+                source = os.path.relpath(path, FRAMEWORK_DIRS["robot"]).replace(os.sep, "/")
+                for name in watch_daemon.robot_test_hashes(path):
+                    if name:
+                        items.append({"framework": "robot", "source": source, "test": name})
+
+    if "pytest" in frameworks:
+        for filename in sorted(os.listdir(FRAMEWORK_DIRS["pytest"])):
+            if filename.startswith("test_") and filename.endswith(".py"):
+                path = os.path.join(FRAMEWORK_DIRS["pytest"], filename)
+                for name in watch_daemon.python_test_hashes(path):
+                    if name:
+                        items.append({"framework": "pytest", "source": filename, "test": name})
+
+    for number, item in enumerate(items, 1):
+        item["id"] = number
+        item["attempts"] = 0
+    return items
+
+
+def new_run_ids(frameworks, now=None):
+    """Create the shared run id of each framework, in its usual folder format."""
+    timestamp = (now or datetime.now()).strftime(retention.TIMESTAMP_FORMAT)
+    run_ids = {}
+    if "robot" in frameworks:
+        output_dir = os.path.join(FRAMEWORK_DIRS["robot"], "test-output")
+        numbers = [int(re.search(r"_Run_(\d+)$", run["name"]).group(1))
+                   for run in retention.list_runs(output_dir) if "_Run_" in run["name"]]
+        run_ids["robot"] = f"{timestamp}_Run_{max(numbers, default=0) + 1:03d}"
+    if "pytest" in frameworks:
+        run_ids["pytest"] = f"Run_{timestamp}"
+    return run_ids
+
+
+def run_dir(framework, run_id):
+    return os.path.join(FRAMEWORK_DIRS[framework], "test-output", run_id)
+
+
+class Coordinator:
+    """Work queue with leases, heartbeats and requeueing of lost work."""
+
+    def __init__(self, items, run_ids, url=None, lease_timeout=LEASE_TIMEOUT):
+        self.lock = threading.Lock()
+        self.artifacts_lock = threading.Lock()
+        self.pending = deque(items)
+        self.total = len(items)
+        self.leases = {}  # token -> {"item", "worker", "expires"}
+        self.results = []
+        self.completed = 0
+        self.run_ids = run_ids
+        self.url = url
+        self.lease_timeout = lease_timeout
+        self.finished = threading.Event()
+        if not items:
+            self.finished.set()
+
+        self.history = run_history.open_history()
+        for framework, run_id in run_ids.items():
+            os.makedirs(run_dir(framework, run_id), exist_ok=True)
+            if self.history:
+                self.history.start_run(run_id, framework, run_dir(framework, run_id))
+
+    def lease(self, worker):
+        """Hand out the next test, or tell the worker to wait or stop."""
+        with self.lock:
+            self._requeue_expired()
+            if self.pending:
+                item = self.pending.popleft()
+                item["attempts"] += 1
+                token = uuid.uuid4().hex
+                self.leases[token] = {"item": item, "worker": worker, "expires": time.monotonic() + self.lease_timeout}
+                return {"lease": token, "item": item, "run_id": self.run_ids[item["framework"]], "url": self.url}
+            if self.leases:
+                return {"wait": POLL_INTERVAL}
+            return {"done": True}
+
+    def heartbeat(self, token):
+        with self.lock:
+            lease = self.leases.get(token)
+            if lease is None:
+                return False
+            lease["expires"] = time.monotonic() + self.lease_timeout
+            return True
+
+    def store_artifacts(self, token, data):
+        """Unpack a worker's zipped test output into the local run folder."""
+        with self.lock:
+            lease = self.leases.get(token)
+            if lease is None:
+                return False
+            # Pinned: the lease cannot expire (and its test be rerun) mid-unpack
+            lease["uploading"] = True
+
+        try:
+            framework = lease["item"]["framework"]
+            target_dir = os.path.realpath(run_dir(framework, self.run_ids[framework]))
+            with self.artifacts_lock, zipfile.ZipFile(io.BytesIO(data)) as zf:
+                for info in zf.infolist():
+                    basename = os.path.basename(info.filename)
+                    if info.is_dir() or basename in SKIPPED_ARTIFACTS:
+                        continue
+                    target = os.path.realpath(os.path.join(target_dir, info.filename))
+                    if not target.startswith(target_dir + os.sep):
+                        continue  # Never write outside the run folder
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    mode = "ab" if basename in APPENDED_ARTIFACTS else "wb"
+                    with zf.open(info) as src, open(target, mode) as dst:
+                        if basename in CSV_ARTIFACTS and dst.tell():
+                            src.readline()
+                        shutil.copyfileobj(src, dst)
+        finally:
+            with self.lock:
+                lease["uploading"] = False
+                lease["expires"] = time.monotonic() + self.lease_timeout
+        return True
+
+    def complete(self, token, payload):
+        """Record the results of a leased test."""
+        with self.lock:
+            lease = self.leases.pop(token, None)
+            if lease is None:
+                return False  # Expired and handed to another worker
+            self._record(lease["item"], payload.get("tests") or [], payload.get("output"), lease["worker"])
+            return True
+
+    def reap(self):
+        with self.lock:
+            self._requeue_expired()
+
+    def _requeue_expired(self):
+        now = time.monotonic()
+        for token, lease in list(self.leases.items()):
+            if lease["expires"] > now or lease.get("uploading"):
+                continue
+            del self.leases[token]
+            item = lease["item"]
+            if item["attempts"] >= MAX_ATTEMPTS:
+                self._record(item, [], f"Worker lost {MAX_ATTEMPTS} times", lease["worker"])
+            else:
+                print(f"⚠️  Lease of {lease['worker']} expired, requeueing {item['test']}")
+                self.pending.appendleft(item)
+
+    def _record(self, item, tests, output, worker):
+        framework = item["framework"]
+        if not tests:
+            # The run crashed before writing results
+            tests = [{
+                "framework": framework, "browser": None, "suite": item["source"], "name": item["test"],
+                "status": "FAIL", "duration": 0.0, "message": (output or "No results")[-2000:],
+            }]
+
+        for test in tests:
+            self.results.append(test)
+            if self.history:
+                test_id = self.history.start_test(self.run_ids[framework], test["suite"], test["name"],
+                                                  test["browser"] or "chromium", item["attempts"])
+                self.history.finish_test(test_id, test["status"], test["duration"], test["message"])
+
+        self.completed += 1
+        statuses = ", ".join(sorted({test["status"] for test in tests}))
+        print(f"[{self.completed}/{self.total}] {statuses:<4} {framework} {item['test']} ({worker})")
+        if self.completed == self.total:
+            self.finished.set()
+
+    def write_report(self):
+        """Write the pytest run's index.html from the collected results."""
+        if "pytest" not in self.run_ids:
+            return None
+        pytest_dir = run_dir("pytest", self.run_ids["pytest"])
+        statuses = run_report.result_statuses(test for test in self.results if test["framework"] == "pytest")
+        try:
+            default_profile = browser_profiles.get_profile() == browser_profiles.DEFAULT_PROFILE
+        except ValueError:
+            default_profile = False
+        visual_diff_link = (default_profile
+                            and visual_diff.report_path(FRAMEWORK_DIRS["pytest"], pytest_dir) is not None)
+        return run_report.write_index(pytest_dir, run_report.folder_tests(pytest_dir, statuses), visual_diff_link)
+
+    def close(self):
+        if self.history:
+            for run_id in self.run_ids.values():
+                self.history.finish_run(run_id)
+            self.history.close()
+            self.history = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        coordinator = self.server.coordinator
+        token = self.server.token
+        if token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, "").encode(), token.encode()):
+            self._reply(401, {"error": "invalid token"})
+            return
+
+        path, _, query = self.path.partition("?")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if path == "/lease":
+            self._reply(200, coordinator.lease(json.loads(body).get("worker")))
+        elif path == "/heartbeat":
+            ok = coordinator.heartbeat(json.loads(body).get("lease"))
+            self._reply(200 if ok else 410, {})
+        elif path == "/artifacts":
+            token = urllib.parse.parse_qs(query).get("lease", [None])[0]
+            self._reply(200 if coordinator.store_artifacts(token, body) else 410, {})
+        elif path == "/result":
+            payload = json.loads(body)
+            self._reply(200 if coordinator.complete(payload.get("lease"), payload) else 410, {})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep the terminal for test progress
+
+
+def parse_address(address, default_host="127.0.0.1"):
+    """Split HOST:PORT (either part optional) into a (host, port) tuple."""
+    host, _, port = address.rpartition(":")
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+def is_loopback(host):
+    """Check whether a bind host only accepts local connections."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def check_bind(bind, token):
+    """Refuse to serve beyond loopback without a shared token (ValueError)."""
+    host = parse_address(bind)[0]
+    if not token and not is_loopback(host):
+        raise ValueError(f"Binding the coordinator to {host} needs a shared token ({TOKEN_ENV} or --token)")
+
+
+def start_server(coordinator, bind=DEFAULT_BIND, token=None):
+    """Serve a coordinator in a background thread. Returns the server.
+
+    With a token, every request must carry it in the X-Coordinator-Token header.
+    """
+    server = ThreadingHTTPServer(parse_address(bind), _Handler)
+    server.daemon_threads = True
+    server.coordinator = coordinator
+    server.token = token
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_coordinator(frameworks, bind=DEFAULT_BIND, url=None, local_workers=0, token=None):
+    """Serve the tests of the given frameworks until all have results.
+
+    token defaults to COORDINATOR_TOKEN; see check_bind. Returns the combined
+    summary (see aggregate_results.summarize).
+    """
+    token = token or os.environ.get(TOKEN_ENV)
+    check_bind(bind, token)
+    items = collect_items(frameworks)
+    coordinator = Coordinator(items, new_run_ids(frameworks), url)
+    try:
+        server = start_server(coordinator, bind, token)
+    except OSError:
+        coordinator.close()
+        raise
+    host, port = server.server_address[:2]
+
+    print(f"\n🛰️  Coordinator on {host}:{port}: {len(items)} tests, run ids {', '.join(coordinator.run_ids.values())}")
+    # Local workers get the token through the environment, not the command line
+    worker_env = {**os.environ, TOKEN_ENV: token} if token else None
+    worker_host = "127.0.0.1" if host == "0.0.0.0" else host
+    workers = [
+        subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, "run_tests.py"),
+                          "--worker", f"{worker_host}:{port}", "--name", f"local-{number}"], env=worker_env)
+        for number in range(1, local_workers + 1)
+    ]
+
+    try:
+        while not coordinator.finished.wait(POLL_INTERVAL):
+            coordinator.reap()
+        # Let idle workers see "done" before the server goes away
+        for worker in workers:
+            worker.wait()
+        time.sleep(2 * POLL_INTERVAL)
+    finally:
+        server.shutdown()
+        server.server_close()
+        for worker in workers:
+            if worker.poll() is None:
+                worker.terminate()
+        coordinator.close()
+
+    report_path = coordinator.write_report()
+    if report_path:
+        print(f"\n📊 Test report created: {report_path}")
+
+    return aggregate_results.summarize(coordinator.results)
+
+
+def _post(url, payload=None, data=None, token=None, timeout=30):
+    if data is None:
+        data = json.dumps(payload).encode("utf-8")
+        content_type = "application/json"
+    else:
+        content_type = "application/zip"
+    headers = {"Content-Type": content_type}
+    if token:
+        headers[TOKEN_HEADER] = token
+    request = urllib.request.Request(url, data=data, method="POST", headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read() or b"{}")
+
+
+def _framework_python(dir_path):
+    """The framework venv's Python, or this interpreter."""
+    venv_dir = os.path.join(dir_path, "venv")
+    if os.path.exists(venv_dir):
+        if sys.platform == "win32":
+            return os.path.join(venv_dir, "Scripts", "python")
+        return os.path.join(venv_dir, "bin", "python")
+    return sys.executable
+
+
+def run_test(item, run_id, url, workdir):
+    """Run one leased test in workdir. Returns (test results, console output)."""
+    framework = item["framework"]
+    dir_path = FRAMEWORK_DIRS[framework]
+    source = os.path.join(dir_path, item["source"])
+    results_dir = os.path.join(workdir, "results")
+    env = {**os.environ, "TEST_RUN_ID": run_id, "TEST_HISTORY": "0"}
+
+    if framework == "robot":
+        result_file = os.path.join(results_dir, "output.xml")
+        command = [_framework_python(dir_path), "-m", "robot", "--outputdir", results_dir,
+                   "--pythonpath", dir_path, "--test", item["test"]]
+        if url:
+            command += ["--variable", f"URL:{url}"]
+        command.append(source)
+    else:
+        result_file = os.path.join(results_dir, "junit.xml")
+        if url:
+            env["BASE_URL"] = url
+        command = [_framework_python(dir_path), "-m", "pytest", f"{source}::{item['test']}",
+                   f"--junitxml={result_file}", "-q", "-p", "no:cacheprovider"]
+
+    # test-output/ is created relative to the working directory
+    try:
+        completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True,
+                                   timeout=TEST_TIMEOUT)
+        output = completed.stdout + completed.stderr
+    except subprocess.TimeoutExpired:
+        output = f"Timed out after {TEST_TIMEOUT}s"
+
+    tests = list(aggregate_results.parse_results(framework, result_file)) if os.path.exists(result_file) else []
+    return tests, output
+
+
+def zip_artifacts(workdir, run_id, item):
+    """Zip the test's output folder plus its framework reports (results/<item id>/)."""
+    buffer = io.BytesIO()
+    sources = [
+        (os.path.join(workdir, "test-output", run_id), ""),
+        (os.path.join(workdir, "results"), f"results/{item['id']:04d}/"),
+    ]
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for base, prefix in sources:
+            for root, dirs, files in os.walk(base):
+                for filename in files:
+                    filepath = os.path.join(root, filename)
+                    member = prefix + os.path.relpath(filepath, base).replace(os.sep, "/")
+                    compress = (zipfile.ZIP_STORED if filename.lower().endswith(retention.STORED_EXTENSIONS)
+                                else zipfile.ZIP_DEFLATED)
+                    zf.write(filepath, member, compress_type=compress)
+    return buffer.getvalue()
+
+
+def run_worker(address, name=None, token=None):
+    """Pull and run tests from a coordinator until it has no work left.
+
+    token defaults to COORDINATOR_TOKEN. Returns the exit code.
+    """
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    token = token or os.environ.get(TOKEN_ENV)
+    base_url = address if address.startswith("http") else "http://{}:{}".format(*parse_address(address))
+    print(f"👷 Worker {name} pulling tests from {base_url}")
+
+    connection_errors = 0
+    while True:
+        try:
+            reply = _post(f"{base_url}/lease", {"worker": name}, token=token)
+        except urllib.error.HTTPError as e:
+            print(f"Worker {name}: coordinator refused the worker (HTTP {e.code}), stopping")
+            return 1
+        except urllib.error.URLError as e:
+            connection_errors += 1
+            if connection_errors >= 3:
+                print(f"Worker {name}: coordinator unreachable ({e.reason}), stopping")
+                return 0
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        connection_errors = 0
+        if reply.get("done"):
+            return 0
+        if "lease" not in reply:
+            time.sleep(reply.get("wait", POLL_INTERVAL))
+            continue
+
+        _run_lease(base_url, reply, name, token)
+
+
+def _run_lease(base_url, reply, name, token=None):
+    lease = reply["lease"]
+    item = reply["item"]
+    workdir = tempfile.mkdtemp(prefix="test-worker-")
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                _post(f"{base_url}/heartbeat", {"lease": lease}, token=token)
+            except (urllib.error.URLError, OSError):
+                pass
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        tests, output = run_test(item, reply["run_id"], reply.get("url"), workdir)
+        _post(f"{base_url}/artifacts?lease={lease}", data=zip_artifacts(workdir, reply["run_id"], item), token=token)
+        _post(f"{base_url}/result", {"lease": lease, "worker": name, "tests": tests, "output": output[-4000:]},
+              token=token)
+    except urllib.error.HTTPError as e:
+        reason = "lease expired" if e.code == 410 else f"HTTP {e.code}"
+        print(f"Worker {name}: result for {item['test']} dropped ({reason})")
+    except urllib.error.URLError as e:
+        # The lease expires on the coordinator and the test is requeued
+        print(f"Worker {name}: could not send result for {item['test']} ({e.reason})")
+    finally:
+        stop.set()
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -4,23 +4,182 @@ Pytest configuration for Playwright tests
 """
 
 import os
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
 import pytest
 from playwright.sync_api import Page
 
+# Shared automation helpers (run history, profiles, pool) live in automation/
+AUTOMATION_DIR = Path(__file__).resolve().parents[2]
+if str(AUTOMATION_DIR) not in sys.path:
+    sys.path.insert(0, str(AUTOMATION_DIR))
+
+import browser_pool  # noqa: E402
+import browser_profiles  # noqa: E402
+import cdp_metrics  # noqa: E402
+import run_history  # noqa: E402
+import run_report  # noqa: E402
+import visual_diff  # noqa: E402
+
 
 TEST_OUTPUT_DIR = None
+HISTORY = None
+TEST_RESULTS = {}  # nodeid -> {"id", "status", "duration"} for run history
+
+# Sample Chromium runtime metrics around test actions (CDP Performance domain)
+CDP_METRICS = os.environ.get("CDP_METRICS", "").lower() in ("1", "true", "yes")
+
+# Re-run failed tests up to N times at the end of the session on the warm browser
+# (RETRY_FAILED=N, validated in pytest_configure)
+RETRY_FAILED = 0
+
+# Launch/context profile: "default" for visual runs, "fast" for functional runs
+# (BROWSER_PROFILE, validated in pytest_configure)
+BROWSER_PROFILE = browser_profiles.DEFAULT_PROFILE
 
 
 def pytest_configure(config):
     """Create test output directory with timestamp."""
-    global TEST_OUTPUT_DIR
+    global TEST_OUTPUT_DIR, RETRY_FAILED
+    retry_failed = os.environ.get("RETRY_FAILED", "0").strip() or "0"
+    if not retry_failed.isdigit():
+        raise pytest.UsageError(f"RETRY_FAILED must be a number of retries (0 or more), got '{retry_failed}'")
+    RETRY_FAILED = int(retry_failed)
+    
+    global BROWSER_PROFILE
+    try:
+        BROWSER_PROFILE = browser_profiles.get_profile()
+    except ValueError:
+        raise pytest.UsageError(
+            f"BROWSER_PROFILE must be one of: {', '.join(browser_profiles.PROFILES)} "
+            f"(got '{os.environ.get('BROWSER_PROFILE')}')"
+        ) from None
+    
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    TEST_OUTPUT_DIR = Path("test-output") / f"Run_{timestamp}"
+    # Distributed runs: every worker writes to the coordinator's run id
+    run_id = os.environ.get("TEST_RUN_ID") or f"Run_{timestamp}"
+    TEST_OUTPUT_DIR = Path("test-output") / run_id
     TEST_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     print(f"\n📁 Test output directory: {TEST_OUTPUT_DIR}")
+    
+    config.addinivalue_line("markers", "shared_page: tests of the class share one logged-in page (SHARED_PAGE=1)")
+    
+    global HISTORY
+    HISTORY = run_history.open_history()
+    if HISTORY:
+        HISTORY.start_run(TEST_OUTPUT_DIR.name, "pytest", str(TEST_OUTPUT_DIR.resolve()))
+
+
+def pytest_runtest_setup(item):
+    """Record the test start in the run history."""
+    if HISTORY is None:
+        return
+    
+    callspec = getattr(item, "callspec", None)
+    browser = callspec.params.get("browser_name", "chromium") if callspec else "chromium"
+    suite = item.nodeid.rsplit("::", 1)[0]
+    test_id = HISTORY.start_test(TEST_OUTPUT_DIR.name, suite, item.name, browser, getattr(item, "attempt", 1))
+    TEST_RESULTS[item.nodeid] = {"id": test_id, "status": "PASS", "duration": 0.0, "message": None}
+
+
+def pytest_runtest_logreport(report):
+    """Record test results (setup + call + teardown) in the run history."""
+    result = TEST_RESULTS.get(report.nodeid)
+    if result is None:
+        return
+    
+    result["duration"] += report.duration
+    retry_failure = getattr(report, "retry_failure", None)
+    if retry_failure:
+        # Not the final attempt: RETRIED keeps the run from being marked failed
+        result["status"] = "RETRIED"
+        result["message"] = result["message"] or retry_failure[:2000]
+    elif report.failed and result["status"] != "RETRIED":
+        result["status"] = "FAIL"
+        result["message"] = result["message"] or report.longreprtext[:2000]
+    elif report.skipped and result["status"] == "PASS":
+        result["status"] = "SKIP"
+    
+    if report.when == "teardown":
+        HISTORY.finish_test(result["id"], result["status"], result["duration"], result["message"])
+        del TEST_RESULTS[report.nodeid]
+
+
+class _KeepSessionFixtures:
+    """nextitem stand-in: tear down everything except session fixtures (browser)."""
+    
+    def __init__(self, session):
+        self.session = session
+    
+    def listchain(self):
+        return [self.session]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtestloop(session):
+    """Run all tests, then re-run failures in the same session (RETRY_FAILED=N)."""
+    if RETRY_FAILED <= 0 or session.config.option.collectonly:
+        return None
+    
+    if session.testsfailed and not session.config.option.continue_on_collection_errors:
+        raise session.Interrupted(f"{session.testsfailed} errors during collection")
+    
+    # The last test of each pass keeps the session-scoped browser running
+    keep_warm = _KeepSessionFixtures(session)
+    pending = list(session.items)
+    for attempt in range(1, RETRY_FAILED + 2):
+        for i, item in enumerate(pending):
+            item.attempt = attempt
+            item.retry_pending = False
+            nextitem = pending[i + 1] if i + 1 < len(pending) else keep_warm
+            item.config.hook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+            if session.shouldfail:
+                raise session.Failed(session.shouldfail)
+            if session.shouldstop:
+                raise session.Interrupted(session.shouldstop)
+        
+        pending = [item for item in pending if item.retry_pending]
+        if not pending:
+            break
+        print(f"\n🔁 Retrying {len(pending)} failed test(s), attempt {attempt + 1}")
+    return True
+
+
+def pytest_report_teststatus(report, config):
+    """Show retried attempts and flaky passes in the terminal summary."""
+    if ("retry", "rerun") in report.user_properties:
+        return "rerun", "R", ("RERUN", {"yellow": True})
+    if report.when == "call" and ("retry", "flaky") in report.user_properties:
+        return "flaky", "~", ("FLAKY", {"yellow": True})
+    return None
+
+
+@pytest.fixture(scope="session")
+def browser(launch_browser, browser_name, playwright):
+    """Browser (watch_daemon.py lends its warm Chromium through WARM_BROWSER_CDP)."""
+    endpoint = os.environ.get(browser_pool.CDP_ENDPOINT_ENV)
+    if endpoint and browser_name == "chromium":
+        browser = playwright.chromium.connect_over_cdp(endpoint)
+        yield browser
+        # Closes this session's contexts and disconnects; the browser keeps running
+        browser.close()
+        return
+    
+    browser = launch_browser()
+    yield browser
+    browser.close()
+
+
+@pytest.fixture(scope="session")
+def browser_type_launch_args(browser_type_launch_args, browser_name):
+    """Configure browser launch (BROWSER_PROFILE=fast forces tuned headless)."""
+    return {
+        **browser_type_launch_args,
+        **browser_profiles.launch_args(BROWSER_PROFILE, browser_name),
+    }
 
 
 @pytest.fixture(scope="session")
@@ -28,35 +187,89 @@ def browser_context_args(browser_context_args):
     """Configure browser context."""
     return {
         **browser_context_args,
-        "viewport": {"width": 1280, "height": 720},
+        **browser_profiles.context_args(BROWSER_PROFILE),
     }
 
 
+@pytest.fixture(scope="session")
+def install_route_filter():
+    """Apply the profile's request blocking to a context created by a test or fixture."""
+    return lambda context: browser_profiles.install_route_filter(context, BROWSER_PROFILE)
+
+
+@pytest.fixture(scope="function")
+def context(context, install_route_filter):
+    """Browser context (images, media, fonts and analytics blocked in the fast profile)."""
+    install_route_filter(context)
+    yield context
+
+
+def make_screenshot_taker(page: Page, test_dir: Path, nodeid: str):
+    """Build the take_screenshot(name) step function for one test."""
+    step = {"count": 0, "last": time.monotonic()}
+    
+    def take_screenshot(name: str):
+        step["count"] += 1
+        filename = f"{step['count']:02d}_{name}.png"
+        filepath = test_dir / filename
+        page.screenshot(full_page=browser_profiles.full_page_screenshots(BROWSER_PROFILE), path=str(filepath))
+        print(f"  📸 Step {step['count']}: {name}")
+        
+        result = TEST_RESULTS.get(nodeid)
+        if result:
+            now = time.monotonic()
+            HISTORY.add_step(result["id"], step["count"], name, str(filepath.resolve()), now - step["last"])
+            step["last"] = now
+    
+    return take_screenshot
+
+
 @pytest.fixture(scope="function")
 def screenshot_page(page: Page, request: pytest.FixtureRequest):
     """Fixture that provides screenshot functionality for tests."""
     global TEST_OUTPUT_DIR
     test_name = request.node.name
     test_dir = TEST_OUTPUT_DIR / test_name
+    
+    # Retries keep their own screenshots: <test>/attempt_2/
+    attempt = getattr(request.node, "attempt", 1)
+    if attempt > 1:
+        test_dir = test_dir / f"attempt_{attempt}"
     test_dir.mkdir(parents=True, exist_ok=True)
     
-    step = {"count": 0}
-    page_obj = page
+    request.node.screenshot = make_screenshot_taker(page, test_dir, request.node.nodeid)
+    yield page
+
+
+@pytest.fixture(scope="function")
+def perf_metrics(page: Page, browser_name: str, request: pytest.FixtureRequest):
+    """Fixture that records CDP runtime metrics around test actions.
     
-    def take_screenshot(name: str):
-        step["count"] += 1
-        filename = f"{step['count']:02d}_{name}.png"
-        filepath = test_dir / filename
-        page_obj.screenshot(full_page=True, path=str(filepath))
-        print(f"  📸 Step {step['count']}: {name}")
+    Enabled with CDP_METRICS=1 on Chromium; a no-op recorder otherwise.
+    """
+    cdp_session = None
+    if CDP_METRICS and browser_name == "chromium":
+        cdp_session = cdp_metrics.open_session(page.context, page)
     
-    request.node.screenshot = take_screenshot
-    yield page
+    test_dir = TEST_OUTPUT_DIR / request.node.name
+    attempt = getattr(request.node, "attempt", 1)
+    if attempt > 1:
+        test_dir = test_dir / f"attempt_{attempt}"
+    
+    # Steps wrap only the action: sample after the same settle wait the screenshots use
+    recorder = cdp_metrics.MetricsRecorder(
+        cdp_session, request.node.name, browser_name, settle=lambda: cdp_metrics.settle(page)
+    )
+    yield recorder
+    if recorder.write(test_dir):
+        print(f"\n  📈 Metrics: {cdp_metrics.format_deltas(recorder.totals())}")
 
 
+@pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_makereport(item, call):
-    """Take screenshot on test failure."""
+    """Take screenshot on test failure; mark retried, flaky and hard failures."""
     global TEST_OUTPUT_DIR
+    attempt = getattr(item, "attempt", 1)
     if call.when == "call" and call.excinfo is not None:
         page = item.funcargs.get("page")
         if page and TEST_OUTPUT_DIR:
@@ -64,9 +277,28 @@ def pytest_runtest_makereport(item, call):
             failure_dir = TEST_OUTPUT_DIR / "failures"
             failure_dir.mkdir(parents=True, exist_ok=True)
             
-            screenshot_path = failure_dir / f"{test_name}_failure.png"
+            suffix = f"_attempt_{attempt}" if attempt > 1 else ""
+            screenshot_path = failure_dir / f"{test_name}{suffix}_failure.png"
             page.screenshot(full_page=True, path=str(screenshot_path))
             print(f"\n📸 Failure screenshot saved: {screenshot_path}")
+    
+    outcome = yield
+    report = outcome.get_result()
+    if not RETRY_FAILED or call.when == "teardown":
+        return
+    
+    if report.failed and attempt <= RETRY_FAILED:
+        # Not final: retried at the end of the session. Reported as skipped so
+        # JUnit XML records the attempt as skipped with the failure as reason.
+        item.retry_pending = True
+        report.retry_failure = report.longreprtext
+        error = call.excinfo.exconly().strip().splitlines()[0] if call.excinfo else "failed"
+        path, lineno, _ = item.location
+        report.outcome = "skipped"
+        report.longrepr = (path, (lineno or 0) + 1, f"Retried (attempt {attempt} failed): {error}")
+        report.user_properties.append(("retry", "rerun"))
+    elif call.when == "call" and attempt > 1:
+        report.user_properties.append(("retry", "flaky" if report.passed else "hard-failure"))
 
 
 def pytest_sessionfinish(session, exitstatus):
@@ -75,153 +307,16 @@ def pytest_sessionfinish(session, exitstatus):
     if not TEST_OUTPUT_DIR or not TEST_OUTPUT_DIR.exists():
         return
     
-    report_path = TEST_OUTPUT_DIR / "index.html"
-    
-    tests = []
-    for test_dir in TEST_OUTPUT_DIR.iterdir():
-        if test_dir.is_dir() and test_dir.name not in ("failures", "videos"):
-            screenshots = list(test_dir.glob("*.png"))
-            tests.append({
-                "name": test_dir.name,
-                "screenshot_count": len(screenshots),
-                "has_screenshots": len(screenshots) > 0,
-                "first_screenshot": screenshots[0].name if screenshots else None
-            })
-    
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Test Run Report - {TEST_OUTPUT_DIR.name}</title>
-    <style>
-        * {{ box-sizing: border-box; margin: 0; padding: 0; }}
-        body {{ 
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: #f5f5f5;
-            padding: 20px;
-        }}
-        .header {{ 
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            border-radius: 10px;
-            margin-bottom: 30px;
-        }}
-        .header h1 {{ font-size: 2em; margin-bottom: 10px; }}
-        .test-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-            gap: 15px;
-        }}
-        .test-card {{
-            border: 1px solid #e0e0e0;
-            border-radius: 8px;
-            padding: 15px;
-            background: #fafafa;
-            transition: transform 0.2s;
-        }}
-        .test-card:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-        }}
-        .test-title {{
-            font-weight: bold;
-            margin-bottom: 10px;
-            color: #333;
-        }}
-        .screenshot-count {{
-            display: inline-block;
-            background: #667eea;
-            color: white;
-            padding: 3px 10px;
-            border-radius: 15px;
-            font-size: 0.8em;
-        }}
-        .view-btn {{
-            display: inline-block;
-            background: #4CAF50;
-            color: white;
-            padding: 8px 15px;
-            border-radius: 5px;
-            text-decoration: none;
-            margin-top: 10px;
-            font-size: 0.9em;
-        }}
-        .view-btn:hover {{ background: #45a049; }}
-        .summary {{
-            background: white;
-            border-radius: 10px;
-            padding: 20px;
-            margin-bottom: 20px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        .summary h2 {{ margin-bottom: 15px; color: #333; }}
-        .summary-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-            gap: 15px;
-        }}
-        .summary-item {{
-            text-align: center;
-            padding: 15px;
-            background: #f8f9fa;
-            border-radius: 8px;
-        }}
-        .summary-number {{
-            font-size: 2em;
-            font-weight: bold;
-            color: #667eea;
-        }}
-        .summary-label {{
-            color: #666;
-            font-size: 0.9em;
-            margin-top: 5px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🧪 Test Automation Report</h1>
-        <p>Run ID: <strong>{TEST_OUTPUT_DIR.name}</strong></p>
-        <p>Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
-    </div>
-    
-    <div class="summary">
-        <h2>📊 Summary</h2>
-        <div class="summary-grid">
-            <div class="summary-item">
-                <div class="summary-number">{len(tests)}</div>
-                <div class="summary-label">Total Tests</div>
-            </div>
-            <div class="summary-item">
-                <div class="summary-number">{sum(t['screenshot_count'] for t in tests)}</div>
-                <div class="summary-label">Screenshots</div>
-            </div>
-        </div>
-    </div>
-    
-    <div class="test-grid">
-"""
-    
-    for test in tests:
-        screenshot_link = f"./{test['name']}/{test['first_screenshot']}" if test['has_screenshots'] else "#"
-        html += f"""
-        <div class="test-card">
-            <div class="test-title">{test['name']}</div>
-            <span class="screenshot-count">{test['screenshot_count']} screenshots</span>
-            <br>
-            <a href="{screenshot_link}" class="view-btn" target="_blank">View Screenshots</a>
-        </div>
-"""
-    
-    html += """
-    </div>
-</body>
-</html>"""
+    if HISTORY:
+        HISTORY.finish_run(TEST_OUTPUT_DIR.name)
+        tests = run_report.history_tests(HISTORY.run_tests(TEST_OUTPUT_DIR.name))
+    else:
+        tests = run_report.folder_tests(TEST_OUTPUT_DIR)
     
-    with open(report_path, "w") as f:
-        f.write(html)
+    # run_tests.py compares default-profile runs with an approved baseline after the session
+    visual_diff_link = (BROWSER_PROFILE == "default"
+                        and visual_diff.report_path(Path(__file__).parent, TEST_OUTPUT_DIR) is not None)
+    report_path = run_report.write_index(TEST_OUTPUT_DIR, tests, visual_diff_link)
     
     print(f"\n📊 Test report created: {report_path}")
     print(f"🌐 Open in browser: file://{report_path}")
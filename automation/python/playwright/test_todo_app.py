@@ -13,10 +13,128 @@ TEST_EMAIL = "test@test.com"
 TEST_PASSWORD = "password"
 BASE_URL = os.environ.get("BASE_URL", "https://mai-automation-project.vercel.app").rstrip("/") + "/"
 
+# Opt-in: tests of a shared_page class reuse one logged-in page per class
+SHARED_PAGE = os.environ.get("SHARED_PAGE", "").lower() in ("1", "true", "yes")
+
+# State of /todos right after login (held in React state, reset by a reload)
+INITIAL_TODOS_STATE = {
+    "path": "/todos",
+    "total": "3",
+    "completed": "1",
+    "items": [
+        {"id": "1", "text": "Buy groceries", "completed": False},
+        {"id": "2", "text": "Walk the dog", "completed": True},
+        {"id": "3", "text": "Read a book", "completed": False},
+    ],
+    "draft": "",
+}
+
+# Read in one evaluate() call, without waiting for any element. Items being
+# edited have no text element (text null), checked items a check icon.
+TODOS_STATE_SCRIPT = """() => ({
+    path: location.pathname,
+    total: document.querySelector('[data-testid="total-count"]')?.textContent,
+    completed: document.querySelector('[data-testid="completed-count"]')?.textContent,
+    items: [...document.querySelectorAll('[data-testid^="todo-item-"]')].map((item) => {
+        const id = item.dataset.testid.slice("todo-item-".length);
+        return {
+            id,
+            text: item.querySelector(`[data-testid="todo-text-${id}"]`)?.textContent.trim() ?? null,
+            completed: item.querySelector(`[data-testid="todo-checkbox-${id}"] svg`) !== null,
+        };
+    }),
+    draft: document.querySelector('[data-testid="new-todo-input"]')?.value ?? "",
+})"""
+
+# How long a reloaded /todos may take to render before a fresh page is used
+RENDER_TIMEOUT = 3000
+
+
+def login(page: Page):
+    """Log in with the test credentials"""
+    page.get_by_test_id("email-input").fill(TEST_EMAIL)
+    page.get_by_test_id("password-input").fill(TEST_PASSWORD)
+    page.get_by_test_id("login-button").click()
+    expect(page.get_by_test_id("todos-title")).to_be_visible()
+
+
+class SharedTodosPage:
+    """One logged-in page reused by all tests of a class.
+    
+    Between tests the page state is read without waiting: an untouched page
+    is reused as is, a changed one is reset by reloading /todos (served from
+    cache). If the reloaded page still differs from the initial state, a
+    fresh context and page are created and logged in instead.
+    """
+    
+    def __init__(self, browser, context_args, install_route_filter):
+        self.browser = browser
+        self.context_args = context_args
+        self.install_route_filter = install_route_filter
+        self.context = None
+        self.page = None
+        self.fresh_pages = 0
+    
+    def open(self):
+        self.close()
+        self.context = self.browser.new_context(**self.context_args)
+        self.install_route_filter(self.context)
+        self.page = self.context.new_page()
+        self.page.goto(BASE_URL)
+        login(self.page)
+        self.fresh_pages += 1
+        return self.page
+    
+    def state(self):
+        return self.page.evaluate(TODOS_STATE_SCRIPT)
+    
+    def reset(self):
+        if self.page is None or self.page.is_closed():
+            return self.open()
+        
+        try:
+            if self.state() == INITIAL_TODOS_STATE:
+                return self.page
+            
+            if self.page.url.rstrip("/").endswith("/todos"):
+                self.page.reload(wait_until="domcontentloaded")
+            else:
+                self.page.goto(f"{BASE_URL}todos", wait_until="domcontentloaded")
+            
+            # A redirect (logged out) is replaced right away; /todos only needs to render
+            if self.state()["path"] == "/todos":
+                self.page.get_by_test_id("todos-title").wait_for(timeout=RENDER_TIMEOUT)
+                if self.state() == INITIAL_TODOS_STATE:
+                    return self.page
+        except Exception:
+            pass
+        
+        print("\n  ♻️  Shared page contaminated, opening a fresh page")
+        return self.open()
+    
+    def close(self):
+        if self.context is not None:
+            self.context.close()
+        self.context = None
+        self.page = None
+
+
+@pytest.fixture(scope="class")
+def shared_todos_page(browser, browser_context_args, install_route_filter):
+    """Logged-in page shared by the tests of one class"""
+    shared = SharedTodosPage(browser, browser_context_args, install_route_filter)
+    yield shared
+    shared.close()
+
 
 @pytest.fixture(scope="function")
-def page(page: Page):
+def page(request: pytest.FixtureRequest):
     """Setup: Navigate to the app before each test"""
+    if SHARED_PAGE and request.node.get_closest_marker("shared_page"):
+        yield request.getfixturevalue("shared_todos_page").reset()
+        return
+    
+    page = request.getfixturevalue("context").new_page()
     page.goto(BASE_URL)
     yield page
 
@@ -65,16 +183,16 @@ class TestLogin:
         expect(page).not_to_have_url(f"{BASE_URL.rstrip('/')}todos")
 
 
+@pytest.mark.shared_page
 class TestTodos:
     """Test the todo functionality"""
     
     @pytest.fixture(autouse=True)
     def login_first(self, page: Page):
         """Login before each todo test"""
-        page.get_by_test_id("email-input").fill(TEST_EMAIL)
-        page.get_by_test_id("password-input").fill(TEST_PASSWORD)
-        page.get_by_test_id("login-button").click()
-        expect(page.get_by_test_id("todos-title")).to_be_visible()
+        if SHARED_PAGE:
+            return  # The shared page is already logged in
+        login(page)
     
     def test_todos_page_loads(self, page: Page):
         """Verify todos page loads with initial data"""
@@ -89,13 +207,14 @@ class TestTodos:
         # Should have 3 initial todos
         expect(page.get_by_test_id("total-count")).to_contain_text("3")
     
-    def test_add_new_todo(self, page: Page):
+    def test_add_new_todo(self, page: Page, perf_metrics):
         """Test adding a new todo"""
         initial_count = page.get_by_test_id("total-count").text_content()
         
         # Add new todo
-        page.get_by_test_id("new-todo-input").fill("Test new todo item")
-        page.get_by_test_id("add-todo-button").click()
+        with perf_metrics.step("add_todo", "Test new todo item"):
+            page.get_by_test_id("new-todo-input").fill("Test new todo item")
+            page.get_by_test_id("add-todo-button").click()
         
         # Check count increased
         expect(page.get_by_test_id("total-count")).to_contain_text(str(int(initial_count) + 1))
@@ -103,7 +222,7 @@ class TestTodos:
         # Check todo appears in list
         expect(page.get_by_text("Test new todo item")).to_be_visible()
     
-    def test_mark_todo_complete(self, page: Page):
+    def test_mark_todo_complete(self, page: Page, perf_metrics):
         """Test marking a todo as complete"""
         # Get first todo checkbox
         first_checkbox = page.get_by_test_id("todo-checkbox-1")
@@ -112,7 +231,8 @@ class TestTodos:
         initial_completed = page.get_by_test_id("completed-count").text_content()
         
         # Click to complete
-        first_checkbox.click()
+        with perf_metrics.step("complete_todo", "todo-1"):
+            first_checkbox.click()
         
         # Verify completed count increased
         expect(page.get_by_test_id("completed-count")).to_contain_text(str(int(initial_completed) + 1))
@@ -127,33 +247,38 @@ class TestTodos:
         # Check count decreased
         expect(page.get_by_test_id("total-count")).to_contain_text(str(int(initial_count) - 1))
     
-    def test_edit_todo(self, page: Page):
+    def test_edit_todo(self, page: Page, perf_metrics):
         """Test editing a todo"""
         # Click edit on first todo
-        page.get_by_test_id("edit-button-1").click()
+        with perf_metrics.step("edit_todo", "todo-1"):
+            page.get_by_test_id("edit-button-1").click()
         
         # Clear and type new text
         page.get_by_test_id("edit-input-1").fill("Updated todo text")
         
         # Save
-        page.get_by_test_id("save-edit-1").click()
+        with perf_metrics.step("save_todo", "todo-1"):
+            page.get_by_test_id("save-edit-1").click()
         
         # Verify text changed
         expect(page.get_by_test_id("todo-text-1")).to_contain_text("Updated todo text")
     
-    def test_filter_todos(self, page: Page):
+    def test_filter_todos(self, page: Page, perf_metrics):
         """Test filtering todos"""
         # Click filter active
-        page.get_by_test_id("filter-active").click()
+        with perf_metrics.step("filter_todos", "active"):
+            page.get_by_test_id("filter-active").click()
         
         # Should show only active todos
         # (Active count from stats should match visible todos)
         
         # Click filter completed
-        page.get_by_test_id("filter-completed").click()
+        with perf_metrics.step("filter_todos", "completed"):
+            page.get_by_test_id("filter-completed").click()
         
         # Click filter all
-        page.get_by_test_id("filter-all").click()
+        with perf_metrics.step("filter_todos", "all"):
+            page.get_by_test_id("filter-all").click()
         
         # Should show all todos again
         expect(page.get_by_test_id("todo-item-1")).to_be_visible()
@@ -168,16 +293,16 @@ class TestTodos:
         expect(page).to_have_url(BASE_URL)
 
 
+@pytest.mark.shared_page
 class TestTodoValidation:
     """Test form validation and edge cases"""
     
     @pytest.fixture(autouse=True)
     def login_first(self, page: Page):
         """Login before each test"""
-        page.get_by_test_id("email-input").fill(TEST_EMAIL)
-        page.get_by_test_id("password-input").fill(TEST_PASSWORD)
-        page.get_by_test_id("login-button").click()
-        expect(page.get_by_test_id("todos-title")).to_be_visible()
+        if SHARED_PAGE:
+            return  # The shared page is already logged in
+        login(page)
     
     def test_cannot_add_empty_todo(self, page: Page):
         """Test that empty todos are not added"""
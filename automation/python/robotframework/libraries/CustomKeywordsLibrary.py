@@ -2,12 +2,27 @@
 
 import os
 import re
+import sys
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from playwright.sync_api import sync_playwright
 from robot.api.deco import library, keyword
 from robot.api import logger
 from robot.libraries.BuiltIn import BuiltIn
 
+# Shared automation helpers (run history, watchdog, profiles, pool) live in automation/
+AUTOMATION_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if AUTOMATION_DIR not in sys.path:
+    sys.path.insert(0, AUTOMATION_DIR)
+
+import browser_pool  # noqa: E402
+import browser_profiles  # noqa: E402
+import browser_watchdog  # noqa: E402
+import cdp_metrics  # noqa: E402
+import run_history  # noqa: E402
+import visual_diff  # noqa: E402
+
 # Global test run tracking
 _global_test_run_id = None
 _global_step_counters = {}  # Track steps per test
@@ -17,6 +32,10 @@ def get_test_run_id():
     """Get or create test run ID for this execution."""
     global _global_test_run_id
     
+    # Distributed runs: every worker writes to the coordinator's run id
+    if _global_test_run_id is None and os.environ.get("TEST_RUN_ID"):
+        _global_test_run_id = os.environ["TEST_RUN_ID"]
+    
     if _global_test_run_id is None:
         now = datetime.now()
         timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")
@@ -90,13 +109,20 @@ def get_test_index(test_name):
     return 1
 
 
+def screenshot_html(filepath):
+    """Log HTML embedding a step screenshot."""
+    return f'<a href="{filepath}" target="_blank"><img src="{filepath}" width="800" style="border:3px solid #FF002B;border-radius:8px;"/></a>'
+
+
 @library(scope="GLOBAL")
 class CustomKeywordsLibrary:
     """Simple keywords for Todo app automation with improved screenshot organization."""
     
     ROBOT_LIBRARY_SCOPE = "GLOBAL"
+    ROBOT_LISTENER_API_VERSION = 3
 
     def __init__(self):
+        self.ROBOT_LIBRARY_LISTENER = self
         self._playwright = None
         self._browser = None
         self._context = None
@@ -104,6 +130,17 @@ class CustomKeywordsLibrary:
         self._current_test_name = None
         self._test_index = None
         self._browser_name = None
+        self._metrics = cdp_metrics.MetricsRecorder(step_number=self._current_step)
+        self._history = run_history.open_history()
+        self._history_test_id = None
+        self._test_started = None
+        self._last_step_time = None
+        self._attempts = {}  # Test long name -> current attempt (in-process retries)
+        self._attempt = 1
+        self._retries = None  # ${RETRY_FAILED}, read on the first test end
+        self._watchdog = None
+        self._pooled_browser = None  # Last browser taken from browser_pool (watch mode)
+        self._profile = None
 
     def _get_page(self):
         """Get browser page."""
@@ -116,17 +153,44 @@ class CustomKeywordsLibrary:
                 headless = headless.lower() not in ("false", "0", "no", "")
             
             self._browser_name = browser
-            self._playwright = sync_playwright().start()
+            self._profile = browser_profiles.get_profile(robot.get_variable_value("${BROWSER_PROFILE}"))
+            launch_args = {"headless": headless, **browser_profiles.launch_args(self._profile, browser)}
             
-            if browser == "firefox":
-                self._browser = self._playwright.firefox.launch(headless=headless)
-            elif browser == "webkit":
-                self._browser = self._playwright.webkit.launch(headless=headless)
+            if browser_pool.enabled():
+                # watch_daemon.py keeps the browser running between runs; its
+                # watchdog count only restarts when the pool launches a new one
+                browser_type = browser if browser in ("firefox", "webkit") else "chromium"
+                self._browser = browser_pool.get_browser(
+                    browser_type, launch_args,
+                    on_launch=lambda launched: self._get_watchdog(launched).browser_launched(),
+                )
+                self._pooled_browser = self._browser
             else:
-                self._browser = self._playwright.chromium.launch(headless=headless)
-            
-            self._context = self._browser.new_context()
+                self._playwright = sync_playwright().start()
+                
+                if browser == "firefox":
+                    self._browser = self._playwright.firefox.launch(**launch_args)
+                elif browser == "webkit":
+                    self._browser = self._playwright.webkit.launch(**launch_args)
+                else:
+                    self._browser = self._playwright.chromium.launch(**launch_args)
+                
+                self._get_watchdog(self._browser).browser_launched()
+        
+        # A retried test gets a fresh context on the still-running browser
+        if self._context is None:
+            robot = BuiltIn()
+            self._context = self._browser.new_context(**browser_profiles.context_args(self._profile))
+            browser_profiles.install_route_filter(self._context, self._profile)
             self._page = self._context.new_page()
+            
+            cdp_enabled = robot.get_variable_value("${CDP_METRICS}") or False
+            if isinstance(cdp_enabled, str):
+                cdp_enabled = cdp_enabled.lower() not in ("false", "0", "no", "")
+            
+            # CDP sessions are only available on Chromium
+            if cdp_enabled and self._browser_name not in ("firefox", "webkit"):
+                self._metrics.cdp_session = cdp_metrics.open_session(self._context, self._page)
         
         return self._page
 
@@ -137,6 +201,10 @@ class CustomKeywordsLibrary:
             _global_step_counters[test_name] = 0
         return _global_step_counters[test_name]
 
+    def _current_step(self):
+        """Step counter of the running test (numbers the metrics records)."""
+        return self._get_step_counter(BuiltIn().get_variable_value('${TEST NAME}') or "Test")
+
     def _increment_step(self, test_name):
         """Increment step counter for specific test."""
         global _global_step_counters
@@ -145,27 +213,23 @@ class CustomKeywordsLibrary:
         _global_step_counters[test_name] += 1
         return _global_step_counters[test_name]
 
-    def _screenshot(self, name):
-        """Take screenshot with improved organization."""
-        page = self._get_page()
-        
-        robot = BuiltIn()
-        test_name = robot.get_variable_value('${TEST NAME}') or "Test"
-        
+    def _test_output_dir(self, test_name):
+        """Get (and create) the output folder for the current test."""
         # Get test index (order in test file)
         if self._current_test_name != test_name:
             self._current_test_name = test_name
             self._test_index = get_test_index(test_name)
+            self._metrics.reset(test_name)
+            self._metrics.browser = self._browser_name or "chromium"
         
         test_index = self._test_index or 1
-        step = self._increment_step(test_name)
         
         # Clean test name for folder
         clean_test_name = test_name.replace(' ', '_')
         
         # Create organized folder structure: test-output/<timestamp>/<browser>/<test>/
         test_run_id = get_test_run_id()
-        screenshots_dir = os.path.join(
+        test_dir = os.path.join(
             os.getcwd(),
             "test-output",
             test_run_id,
@@ -173,31 +237,244 @@ class CustomKeywordsLibrary:
             f"{test_index:02d}_{clean_test_name}"
         )
         
-        os.makedirs(screenshots_dir, exist_ok=True)
+        # Retries keep their own screenshots: <NN>_<test>/attempt_2/
+        if self._attempt > 1:
+            test_dir = os.path.join(test_dir, f"attempt_{self._attempt}")
+        
+        os.makedirs(test_dir, exist_ok=True)
+        return test_dir
+
+    @contextmanager
+    def _measure(self, action, target=None):
+        """Record CDP metric deltas for an action (screenshot cost excluded)."""
+        try:
+            with self._metrics.step(action, target):
+                yield
+        finally:
+            if self._metrics.cdp_session is not None:
+                # Written after every step so failed tests keep their metrics
+                test_name = BuiltIn().get_variable_value('${TEST NAME}') or "Test"
+                self._metrics.write(self._test_output_dir(test_name))
+                logger.info(f"Metrics {action}: {cdp_metrics.format_deltas(self._metrics.records[-1]['deltas'])}")
+
+    def _log_metrics_summary(self):
+        """Log per-test metrics summary table."""
+        if self._metrics.records:
+            BuiltIn().log(self._metrics.html_summary(), "HTML")
+
+    def _screenshot(self, name):
+        """Take screenshot with improved organization."""
+        page = self._get_page()
+        
+        robot = BuiltIn()
+        test_name = robot.get_variable_value('${TEST NAME}') or "Test"
+        
+        screenshots_dir = self._test_output_dir(test_name)
+        step = self._increment_step(test_name)
         
         # Clean filename: 01_page_loaded.png
         filename = f"{step:02d}_{name}.png"
         filepath = os.path.join(screenshots_dir, filename)
         
         # Wait for page to be ready before screenshot (fixes CI timing issues)
-        page.wait_for_load_state("domcontentloaded")
-        page.wait_for_timeout(500)
+        cdp_metrics.settle(page)
         
-        page.screenshot(path=filepath, full_page=True)
+        # Keep screenshot layout/paint work out of the action's metrics
+        with self._metrics.exclude():
+            page.screenshot(path=filepath, full_page=browser_profiles.full_page_screenshots(self._profile))
+        
+        if self._history_test_id is not None:
+            now = time.monotonic()
+            self._history.add_step(self._history_test_id, step, name, filepath, now - self._last_step_time)
+            self._last_step_time = now
         
         # Log with relative path
         rel_path = os.path.relpath(filepath, os.getcwd())
         logger.info(f"Screenshot saved: {rel_path}")
         
         # Show in log
-        html = f'<a href="{filepath}" target="_blank"><img src="{filepath}" width="800" style="border:3px solid #FF002B;border-radius:8px;"/></a>'
-        BuiltIn().log(html, "HTML")
+        BuiltIn().log(screenshot_html(filepath), "HTML")
+
+    def _get_watchdog(self, browser=None):
+        """Get the browser memory watchdog (limits from robot variables).
+        
+        A pooled browser outlives this library instance (watch mode re-imports
+        it for every run), so its watchdog is kept in the pool with it.
+        """
+        pool_state = browser_pool.state(browser)
+        watchdog = pool_state.get("watchdog") if pool_state is not None else self._watchdog
+        if watchdog is None:
+            robot = BuiltIn()
+            max_tests = robot.get_variable_value("${BROWSER_RECYCLE_TESTS}", browser_watchdog.DEFAULT_MAX_TESTS)
+            max_rss_mb = robot.get_variable_value("${BROWSER_MEMORY_LIMIT_MB}", browser_watchdog.DEFAULT_MAX_RSS_MB)
+            watchdog = browser_watchdog.BrowserWatchdog(int(max_tests), int(max_rss_mb))
+            if pool_state is not None:
+                pool_state["watchdog"] = watchdog
+            else:
+                self._watchdog = watchdog
+        return watchdog
+
+    def _check_browser_health(self, test_name):
+        """Close leaked contexts, log memory and recycle the browser past its limits."""
+        # Step counters are only needed while the test runs
+        _global_step_counters.pop(test_name, None)
+        
+        # Close Browser gives a pooled browser back to the pool: it keeps running and is still checked
+        browser = self._browser or self._pooled_browser
+        if browser is not None and not browser.is_connected():
+            browser = self._pooled_browser = None
+        
+        watchdog = self._get_watchdog(browser)
+        memory_log = os.path.join(os.getcwd(), "test-output", get_test_run_id(), "memory.csv")
+        if browser is None:
+            watchdog.log(memory_log, test_name, "closed", watchdog.sample())
+            return
+        
+        watchdog.test_finished()
+        sample = watchdog.sample(browser)
+        reason = watchdog.recycle_reason(sample)
+        watchdog.log(memory_log, test_name, f"recycle: {reason}" if reason else "open", sample)
+        
+        if browser.contexts:
+            logger.warn(f"Closing {len(browser.contexts)} leaked browser context(s) after '{test_name}'")
+            for context in list(browser.contexts):
+                try:
+                    context.close()
+                except Exception:
+                    pass
+            self._context = None
+            self._page = None
+            self._metrics.cdp_session = None
+        
+        if reason:
+            logger.info(f"Recycling browser: {reason}")
+            browser_pool.discard(browser)
+            self._pooled_browser = None
+            if browser is self._browser:
+                self._shutdown_browser()
+            else:
+                browser.close()
+
+    def _close_context(self):
+        """Close the current context and page, keeping the browser running."""
+        self._metrics.cdp_session = None
+        if self._context:
+            try:
+                self._context.close()
+            except Exception:
+                pass
+        self._context = None
+        self._page = None
+
+    def _get_retries(self):
+        """Retry limit from ${RETRY_FAILED} (checked once; invalid values disable retries)."""
+        if self._retries is None:
+            value = str(BuiltIn().get_variable_value("${RETRY_FAILED}") or 0).strip()
+            if value.isdigit():
+                self._retries = int(value)
+            else:
+                self._retries = 0
+                logger.error(f"RETRY_FAILED must be a number of retries (0 or more), got '{value}'; "
+                             f"failed tests are not retried")
+        return self._retries
+
+    def start_suite(self, data, result):
+        """Listener: link the visual diff report from the top-level suite metadata.
+
+        Library listeners only see the suites importing the library, so the
+        link goes on their root result suite (a directory run's top suite).
+        """
+        root = result
+        while root.parent is not None:
+            root = root.parent
+        if "Visual Diff" in root.metadata:
+            return
+        
+        # run_tests.py compares default-profile runs with an approved baseline after the run
+        robot = BuiltIn()
+        if browser_profiles.get_profile(robot.get_variable_value("${BROWSER_PROFILE}")) != "default":
+            return
+        run_dir = os.path.join(os.getcwd(), "test-output", get_test_run_id())
+        report = visual_diff.report_path(os.getcwd(), run_dir)
+        if report:
+            link = os.path.relpath(report, robot.get_variable_value("${OUTPUT DIR}") or os.getcwd())
+            root.metadata["Visual Diff"] = f"[{link.replace(os.sep, '/')}|summary.html]"
+
+    def start_test(self, data, result):
+        """Listener: track the attempt and record the test start in the run history."""
+        test_key = f"{data.parent.name}.{data.name}"
+        self._attempt = self._attempts.get(test_key, 0) + 1
+        self._attempts[test_key] = self._attempt
+        self._current_test_name = None
+        if self._attempt > 1:
+            _global_step_counters[data.name] = 0
+        
+        self._test_started = self._last_step_time = time.monotonic()
+        if self._history is None:
+            return
+        
+        test_run_id = get_test_run_id()
+        browser = BuiltIn().get_variable_value("${BROWSER}") or "chromium"
+        self._history.start_run(test_run_id, "robot", os.path.join(os.getcwd(), "test-output", test_run_id))
+        self._history_test_id = self._history.start_test(
+            test_run_id, data.parent.name, data.name, browser, self._attempt
+        )
+
+    def end_test(self, data, result):
+        """Listener: record the result, retry failures and mark failed runs for retention."""
+        duration = time.monotonic() - self._test_started
+        self._check_browser_health(data.name)
+        
+        retries = self._get_retries()
+        retry = result.failed and self._attempt <= retries
+        if self._history_test_id is not None:
+            # Non-final attempts are RETRIED so they don't mark the run failed
+            status = "RETRIED" if retry else result.status
+            self._history.finish_test(self._history_test_id, status, duration, result.message)
+            self._history_test_id = None
+        
+        if retries and self._attempt > 1:
+            if result.passed:
+                result.tags.add("flaky")
+                result.message = f"Flaky: passed on attempt {self._attempt}"
+            elif result.failed:
+                result.tags.add("hard-failure")
+        
+        if not result.failed:
+            return
+        
+        if retry:
+            # Re-run at the end of this suite on the warm browser with a fresh context
+            self._close_context()
+            data.parent.tests.append(data.copy())
+            result.status = "SKIP"
+            result.message = f"Retried (attempt {self._attempt} failed): {result.message}"
+            result.tags.add("retried")
+            return
+        
+        # Final failing attempt: mark the run failed for retention
+        run_dir = os.path.join(os.getcwd(), "test-output", get_test_run_id())
+        os.makedirs(run_dir, exist_ok=True)
+        with open(os.path.join(run_dir, "failures.txt"), "a", encoding="utf-8") as f:
+            f.write(f"{self._browser_name or 'chromium'}\t{result.name}\n")
+
+    def close(self):
+        """Listener: mark the run finished in the run history."""
+        if self._history is None:
+            return
+        
+        if _global_test_run_id is not None:
+            self._history.finish_run(_global_test_run_id)
+        self._history.close()
+        self._history = None
 
     @keyword("Open Browser")
     def open_browser(self, browser="chromium", headless=False):
         """Open browser."""
         logger.info(f"Opening {browser}")
-        self._browser_name = browser
+        # A warm browser kept for a retry already knows its name
+        if self._browser is None:
+            self._browser_name = browser
         
         # Log test run info
         test_run_id = get_test_run_id()
@@ -206,8 +483,17 @@ class CustomKeywordsLibrary:
     @keyword("Close Browser")
     def close_browser(self):
         """Close browser."""
+        self._log_metrics_summary()
+        self._shutdown_browser()
+
+    def _shutdown_browser(self):
+        """Close the browser and stop Playwright (pooled browsers keep running)."""
+        self._close_context()
         if self._browser:
-            self._browser.close()
+            if browser_pool.is_pooled(self._browser):
+                browser_pool.release(self._browser)
+            else:
+                self._browser.close()
             self._browser = None
         if self._playwright:
             self._playwright.stop()
@@ -240,39 +526,43 @@ class CustomKeywordsLibrary:
         """Add a todo."""
         page = self._get_page()
         
-        page.get_by_placeholder("What needs to be done?").fill(text)
-        self._screenshot(f"todo_typed_{text.replace(' ', '_')}")
-        
-        page.get_by_role("button", name="Add").click()
-        page.wait_for_timeout(500)
-        self._screenshot(f"todo_added_{text.replace(' ', '_')}")
+        with self._measure("add_todo", text):
+            page.get_by_placeholder("What needs to be done?").fill(text)
+            self._screenshot(f"todo_typed_{text.replace(' ', '_')}")
+            
+            page.get_by_role("button", name="Add").click()
+            page.wait_for_timeout(500)
+            self._screenshot(f"todo_added_{text.replace(' ', '_')}")
 
     @keyword("Complete Todo")
     def complete_todo(self, text):
         """Complete a todo."""
         page = self._get_page()
-        todo = page.get_by_role("listitem").filter(has_text=text)
-        checkbox = todo.locator("button[data-testid^='todo-checkbox']")
-        checkbox.click()
-        self._screenshot(f"todo_completed_{text.replace(' ', '_')}")
+        with self._measure("complete_todo", text):
+            todo = page.get_by_role("listitem").filter(has_text=text)
+            checkbox = todo.locator("button[data-testid^='todo-checkbox']")
+            checkbox.click()
+            self._screenshot(f"todo_completed_{text.replace(' ', '_')}")
 
     @keyword("Delete Todo")
     def delete_todo(self, text):
         """Delete a todo."""
         page = self._get_page()
-        todo = page.get_by_role("listitem").filter(has_text=text)
-        delete_btn = todo.locator("button[data-testid^='delete-button']")
-        delete_btn.click()
-        page.wait_for_timeout(500)
-        self._screenshot(f"todo_deleted_{text.replace(' ', '_')}")
+        with self._measure("delete_todo", text):
+            todo = page.get_by_role("listitem").filter(has_text=text)
+            delete_btn = todo.locator("button[data-testid^='delete-button']")
+            delete_btn.click()
+            page.wait_for_timeout(500)
+            self._screenshot(f"todo_deleted_{text.replace(' ', '_')}")
 
     @keyword("Filter Todos")
     def filter_todos(self, status):
         """Filter todos by status: all, active, completed."""
         page = self._get_page()
-        page.get_by_role("button", name=status.lower()).click()
-        page.wait_for_timeout(500)
-        self._screenshot(f"filtered_{status}")
+        with self._measure("filter_todos", status):
+            page.get_by_role("button", name=status.lower()).click()
+            page.wait_for_timeout(500)
+            self._screenshot(f"filtered_{status}")
 
     @keyword("Verify Todo Visible")
     def verify_todo_visible(self, text):
@@ -303,8 +593,9 @@ class CustomKeywordsLibrary:
         page = self._get_page()
         delete_buttons = page.locator("button[data-testid^='delete-button']")
         
-        while delete_buttons.count() > 0:
-            delete_buttons.first.click()
-            page.wait_for_timeout(300)
+        with self._measure("clear_all_todos"):
+            while delete_buttons.count() > 0:
+                delete_buttons.first.click()
+                page.wait_for_timeout(300)
         
         self._screenshot("all_todos_cleared")
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""Test-output retention: prune, archive and extract old test runs.
+
+Run folders are created by every Robot, pytest and TypeScript run:
+
+    test-output/2026-02-14_10-30-00_Run_001/   (Robot Framework, TypeScript)
+    test-output/Run_2026-02-14_10-30-00/       (pytest)
+
+Rules applied by `apply_retention`:
+    - the newest `keep_last` runs are always kept
+    - runs older than `max_age_days` are expired
+    - other runs beyond `keep_last` are expired unless they failed
+      and `keep_failed` is set
+
+Failed runs are known from the run history and from failure markers in the
+run folder. TypeScript runs have neither: their failures are read from
+typescript/results/junit.xml and recorded as a failures.txt marker.
+
+Expired runs are deleted, or packed into `test-output/archive/<run>.zip`
+when archiving is enabled. `archive/index.json` lists the files of every
+archived run so single screenshots can be extracted without unpacking
+the whole archive.
+
+Usage:
+    python retention.py prune [--dir DIR] [--keep-last N] [--max-age-days D] [--archive]
+    python retention.py list [--dir DIR]
+    python retention.py extract RUN_ID MEMBER [--dir DIR] [--dest DEST]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import zipfile
+from datetime import datetime, timedelta
+
+import aggregate_results
+import run_history
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# test-output folders of the three frameworks
+OUTPUT_DIRS = [
+    os.path.join(SCRIPT_DIR, "python", "robotframework", "test-output"),
+    os.path.join(SCRIPT_DIR, "python", "playwright", "test-output"),
+    os.path.join(SCRIPT_DIR, "typescript", "test-output"),
+]
+
+ARCHIVE_DIR_NAME = "archive"
+INDEX_FILE_NAME = "index.json"
+
+DEFAULT_KEEP_LAST = 10
+DEFAULT_MAX_AGE_DAYS = 30
+
+RUN_DIR_PATTERNS = [
+    re.compile(r'^(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})_Run_\d+$'),
+    re.compile(r'^Run_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})$'),
+]
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+# Markers left behind by failed runs (used when no run history is available)
+FAILURE_MARKERS = ("failures", "failures.txt")
+
+# Entries next to the run folders that are never runs (TypeScript keeps a
+# `latest` symlink and a `.current-run` file there)
+SKIPPED_ENTRIES = (ARCHIVE_DIR_NAME, "latest", ".current-run")
+
+# Frameworks without run history: failures are read from their JUnit results
+JUNIT_RESULTS = {
+    os.path.join(SCRIPT_DIR, "typescript", "test-output"): ("typescript", aggregate_results.RESULT_FILES["typescript"]),
+}
+
+# Already-compressed files are stored as-is in archives
+STORED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webm", ".zip")
+
+
+def parse_run_timestamp(name):
+    """Get the start time of a run from its folder name, or None."""
+    for pattern in RUN_DIR_PATTERNS:
+        match = pattern.match(name)
+        if match:
+            return datetime.strptime(match.group(1), TIMESTAMP_FORMAT)
+    return None
+
+
+def list_runs(output_dir, failed_runs=None):
+    """List run folders in output_dir, oldest first.
+
+    failed_runs is a set of run ids known to have failed (from the run
+    history); failure markers in the folder are checked as well.
+    """
+    failed_runs = failed_runs or set()
+    runs = []
+    if not os.path.isdir(output_dir):
+        return runs
+
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if entry.name in SKIPPED_ENTRIES or entry.is_symlink() or not entry.is_dir(follow_symlinks=False):
+                continue
+            started = parse_run_timestamp(entry.name)
+            if started is None:
+                continue
+            runs.append({
+                "name": entry.name,
+                "path": entry.path,
+                "started": started,
+                "failed": entry.name in failed_runs or run_failed(entry.path),
+            })
+
+    runs.sort(key=lambda run: (run["started"], run["name"]))
+    return runs
+
+
+def run_failed(run_path):
+    """Check whether a run folder contains failure markers."""
+    return any(os.path.exists(os.path.join(run_path, marker)) for marker in FAILURE_MARKERS)
+
+
+def junit_failures(runs, framework, junit_path):
+    """Find the run that wrote junit_path and its failed tests.
+
+    The JUnit file is rewritten by every run, so it belongs to the newest
+    run started before the file was written. Returns (run, [(browser, name)]),
+    or (None, []) when there is no such run.
+    """
+    if not runs or not os.path.exists(junit_path):
+        return None, []
+
+    written = datetime.fromtimestamp(os.path.getmtime(junit_path))
+    started = [run for run in runs if run["started"] <= written]
+    if not started:
+        return None, []
+
+    failures = [
+        (result["browser"] or "", result["name"])
+        for result in aggregate_results.parse_junit(junit_path, framework)
+        if result["status"] == "FAIL"
+    ]
+    return started[-1], failures
+
+
+def write_failure_marker(run_path, failures):
+    """Write failures.txt (browser<TAB>test per line) into a run folder."""
+    with open(os.path.join(run_path, "failures.txt"), "a", encoding="utf-8") as f:
+        for browser, name in failures:
+            f.write(f"{browser}\t{name}\n")
+
+
+def select_expired(runs, keep_last=DEFAULT_KEEP_LAST, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                   keep_failed=True, now=None):
+    """Pick the runs (oldest first) that the retention rules expire."""
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=max_age_days) if max_age_days is not None else None
+
+    candidates = runs[:-keep_last] if keep_last > 0 else list(runs)
+    expired = []
+    for run in candidates:
+        if cutoff is not None and run["started"] < cutoff:
+            expired.append(run)
+        elif not (keep_failed and run["failed"]):
+            expired.append(run)
+    return expired
+
+
+def load_index(archive_dir):
+    """Load the archive index ({run_id: entry})."""
+    index_path = os.path.join(archive_dir, INDEX_FILE_NAME)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_index(archive_dir, index):
+    """Write the archive index atomically."""
+    index_path = os.path.join(archive_dir, INDEX_FILE_NAME)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+
+def archive_run(run, archive_dir, index):
+    """Pack a run folder into <archive_dir>/<run>.zip and record it in the index."""
+    os.makedirs(archive_dir, exist_ok=True)
+    archive_name = f"{run['name']}.zip"
+    archive_path = os.path.join(archive_dir, archive_name)
+
+    members = []
+    with zipfile.ZipFile(archive_path, "w") as zf:
+        for root, dirs, files in os.walk(run["path"]):
+            dirs.sort()
+            for filename in sorted(files):
+                filepath = os.path.join(root, filename)
+                member = os.path.relpath(filepath, run["path"]).replace(os.sep, "/")
+                compress = (zipfile.ZIP_STORED if filename.lower().endswith(STORED_EXTENSIONS)
+                            else zipfile.ZIP_DEFLATED)
+                zf.write(filepath, member, compress_type=compress)
+                members.append(member)
+
+    index[run["name"]] = {
+        "archive": archive_name,
+        "started": run["started"].strftime(TIMESTAMP_FORMAT),
+        "archived": datetime.now().strftime(TIMESTAMP_FORMAT),
+        "failed": run["failed"],
+        "files": members,
+    }
+    return archive_path
+
+
+def apply_retention(output_dir, keep_last=DEFAULT_KEEP_LAST, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                    keep_failed=True, archive=False, dry_run=False):
+    """Apply the retention rules to one test-output folder.
+
+    Run history rows of deleted runs are removed as well; archived runs
+    keep theirs.
+
+    Returns {"removed": [...], "archived": [...], "kept": N}.
+    """
+    history = run_history.open_history(read_only=True)
+    if history:
+        failed_runs = history.failed_runs()
+        history.close()
+    else:
+        failed_runs = set()
+
+    runs = list_runs(output_dir, failed_runs)
+
+    junit = JUNIT_RESULTS.get(os.path.abspath(output_dir))
+    if junit:
+        run, failures = junit_failures(runs, *junit)
+        if failures and not run["failed"]:
+            run["failed"] = True
+            if not dry_run:
+                write_failure_marker(run["path"], failures)
+
+    expired = select_expired(runs, keep_last, max_age_days, keep_failed)
+    result = {"removed": [], "archived": [], "kept": len(runs) - len(expired)}
+    if dry_run or not expired:
+        result["archived" if archive else "removed"] = [run["name"] for run in expired]
+        return result
+
+    archive_dir = os.path.join(output_dir, ARCHIVE_DIR_NAME)
+    index = load_index(archive_dir) if archive else None
+
+    for run in expired:
+        if archive:
+            archive_run(run, archive_dir, index)
+            # Persist after every run so an interrupted prune keeps a valid index
+            save_index(archive_dir, index)
+            result["archived"].append(run["name"])
+        else:
+            result["removed"].append(run["name"])
+        shutil.rmtree(run["path"], ignore_errors=True)
+
+    history = run_history.open_history(create=False) if result["removed"] else None
+    if history:
+        history.delete_runs(result["removed"])
+        history.close()
+
+    return result
+
+
+def policy_from_env():
+    """Build apply_retention keyword arguments from environment variables."""
+    max_age = os.environ.get("TEST_OUTPUT_MAX_AGE_DAYS", str(DEFAULT_MAX_AGE_DAYS))
+    return {
+        "keep_last": int(os.environ.get("TEST_OUTPUT_KEEP_LAST", DEFAULT_KEEP_LAST)),
+        "max_age_days": None if max_age.lower() in ("", "0", "none") else int(max_age),
+        "keep_failed": os.environ.get("TEST_OUTPUT_KEEP_FAILED", "1").lower() not in ("0", "false", "no"),
+        "archive": os.environ.get("TEST_OUTPUT_ARCHIVE", "").lower() in ("1", "true", "yes"),
+    }
+
+
+def extract_file(output_dir, run_id, member, dest_dir=None):
+    """Extract a single file of an archived run. Returns the extracted path."""
+    archive_dir = os.path.join(output_dir, ARCHIVE_DIR_NAME)
+    index = load_index(archive_dir)
+    if run_id not in index:
+        raise KeyError(f"Run not archived: {run_id}")
+
+    entry = index[run_id]
+    if member not in entry["files"]:
+        raise KeyError(f"{member} not found in {run_id}")
+
+    dest_dir = dest_dir or os.path.join(output_dir, run_id)
+    with zipfile.ZipFile(os.path.join(archive_dir, entry["archive"])) as zf:
+        return zf.extract(member, dest_dir)
+
+
+def _cmd_prune(args):
+    policy = {
+        "keep_last": args.keep_last,
+        "max_age_days": args.max_age_days or None,
+        "keep_failed": not args.no_keep_failed,
+        "archive": args.archive,
+        "dry_run": args.dry_run,
+    }
+    for output_dir in args.dir or OUTPUT_DIRS:
+        result = apply_retention(output_dir, **policy)
+        action = "Would clean" if args.dry_run else "Cleaned"
+        print(f"{action} {output_dir}: {len(result['removed'])} removed, "
+              f"{len(result['archived'])} archived, {result['kept']} kept")
+        for name in result["removed"]:
+            print(f"  - {name}")
+        for name in result["archived"]:
+            print(f"  + {name} -> {ARCHIVE_DIR_NAME}/{name}.zip")
+    return 0
+
+
+def _cmd_list(args):
+    for output_dir in args.dir or OUTPUT_DIRS:
+        index = load_index(os.path.join(output_dir, ARCHIVE_DIR_NAME))
+        if not index:
+            continue
+        print(f"{output_dir}:")
+        for run_id, entry in sorted(index.items()):
+            status = "FAILED" if entry["failed"] else "ok"
+            print(f"  {run_id}  {len(entry['files'])} files  {status}")
+    return 0
+
+
+def _cmd_extract(args):
+    for output_dir in args.dir or OUTPUT_DIRS:
+        try:
+            path = extract_file(output_dir, args.run_id, args.member, args.dest)
+        except KeyError:
+            continue
+        print(f"Extracted: {path}")
+        return 0
+    print(f"Not found: {args.run_id}/{args.member}")
+    return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune and archive old test-output runs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prune = subparsers.add_parser("prune", help="Apply retention rules")
+    prune.add_argument("--dir", action="append", help="test-output folder (default: all frameworks)")
+    prune.add_argument("--keep-last", type=int, default=DEFAULT_KEEP_LAST)
+    prune.add_argument("--max-age-days", type=int, default=DEFAULT_MAX_AGE_DAYS, help="0 disables the age rule")
+    prune.add_argument("--no-keep-failed", action="store_true", help="Expire failed runs like passed ones")
+    prune.add_argument("--archive", action="store_true", help="Archive expired runs instead of deleting")
+    prune.add_argument("--dry-run", action="store_true")
+    prune.set_defaults(func=_cmd_prune)
+
+    list_cmd = subparsers.add_parser("list", help="List archived runs")
+    list_cmd.add_argument("--dir", action="append")
+    list_cmd.set_defaults(func=_cmd_list)
+
+    extract = subparsers.add_parser("extract", help="Extract one file from an archived run")
+    extract.add_argument("run_id")
+    extract.add_argument("member", help="Path inside the run, e.g. chromium/01_Login_And_Add_Todo/01_page_loaded.png")
+    extract.add_argument("--dir", action="append")
+    extract.add_argument("--dest", help="Destination folder (default: test-output/<run_id>)")
+    extract.set_defaults(func=_cmd_extract)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""SQLite run history for Robot Framework and pytest runs.
+
+Every run records its tests, per-step screenshots and timings into
+`automation/test-history.db` (override with TEST_HISTORY_DB, disable with
+TEST_HISTORY=0). Reports and test-output retention query it instead of
+rescanning test-output folders.
+
+Failed attempts that are retried (RETRY_FAILED) are stored as RETRIED; only
+the final attempt of a test is PASS or FAIL.
+
+Usage:
+    python run_history.py runs [--limit N]
+    python run_history.py slowest [--runs 30] [--limit 10] [--framework robot]
+    python run_history.py flaky [--runs 30] [--framework pytest]
+    python run_history.py trend "Login And Add Todo" [--runs 30]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from urllib.request import pathname2url
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(SCRIPT_DIR, "test-history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    framework TEXT NOT NULL,
+    output_dir TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    suite TEXT,
+    name TEXT NOT NULL,
+    browser TEXT,
+    attempt INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'RUNNING',
+    duration REAL,
+    started_at TEXT NOT NULL,
+    message TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    test_id INTEGER NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    step INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    screenshot TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(framework, started_at);
+CREATE INDEX IF NOT EXISTS idx_tests_run ON tests(run_id);
+CREATE INDEX IF NOT EXISTS idx_tests_name ON tests(name, browser);
+CREATE INDEX IF NOT EXISTS idx_steps_test ON steps(test_id);
+"""
+
+# Run ids of the last N runs (params: framework, framework, N)
+RECENT_RUNS_SQL = (
+    "SELECT run_id FROM runs WHERE (? IS NULL OR framework = ?) "
+    "ORDER BY started_at DESC, rowid DESC LIMIT ?"
+)
+
+
+def _now():
+    return datetime.now().isoformat(timespec="milliseconds")
+
+
+class RunHistory:
+    """Read/write access to the run history database."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, read_only=False):
+        self.path = path
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True, timeout=30)
+        else:
+            self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        if not read_only:
+            # WAL lets several test processes write while reports read
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # -- Writing ------------------------------------------------------------
+
+    def start_run(self, run_id, framework, output_dir=None):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, framework, output_dir, started_at) VALUES (?, ?, ?, ?)",
+                (run_id, framework, output_dir, _now()),
+            )
+
+    def finish_run(self, run_id, status=None):
+        """Mark a run finished; status defaults to FAIL if any test failed."""
+        with self.conn:
+            if status is None:
+                failed = self.conn.execute(
+                    "SELECT 1 FROM tests WHERE run_id = ? AND status = 'FAIL' LIMIT 1", (run_id,)
+                ).fetchone()
+                status = "FAIL" if failed else "PASS"
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?",
+                (_now(), status, run_id),
+            )
+
+    def start_test(self, run_id, suite, name, browser, attempt=1):
+        """Record a test start. Returns the test id for steps and results."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO tests (run_id, suite, name, browser, attempt, started_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, suite, name, browser, attempt, _now()),
+            )
+        return cursor.lastrowid
+
+    def add_step(self, test_id, step, name, screenshot=None, duration=None):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO steps (test_id, step, name, screenshot, duration) VALUES (?, ?, ?, ?, ?)",
+                (test_id, step, name, screenshot, duration),
+            )
+
+    def finish_test(self, test_id, status, duration=None, message=None):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tests SET status = ?, duration = ?, message = ? WHERE id = ?",
+                (status, duration, message, test_id),
+            )
+
+    def delete_runs(self, run_ids):
+        """Remove runs with their tests and steps (their folders were deleted)."""
+        with self.conn:
+            for run_id in run_ids:
+                self.conn.execute(
+                    "DELETE FROM steps WHERE test_id IN (SELECT id FROM tests WHERE run_id = ?)", (run_id,)
+                )
+                self.conn.execute("DELETE FROM tests WHERE run_id = ?", (run_id,))
+                self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    # -- Queries ------------------------------------------------------------
+
+    def recent_runs(self, limit=20, framework=None):
+        return self.conn.execute(
+            "SELECT r.*, "
+            "(SELECT COUNT(*) FROM tests t WHERE t.run_id = r.run_id AND t.status != 'RETRIED') AS tests, "
+            "(SELECT COUNT(*) FROM tests t WHERE t.run_id = r.run_id AND t.status = 'FAIL') AS failed "
+            "FROM runs r WHERE (? IS NULL OR framework = ?) ORDER BY started_at DESC, rowid DESC LIMIT ?",
+            (framework, framework, limit),
+        ).fetchall()
+
+    def run_tests(self, run_id):
+        """Tests of a run with their step count and first screenshot."""
+        return self.conn.execute(
+            "SELECT t.*, COUNT(s.id) AS steps, "
+            "(SELECT screenshot FROM steps WHERE test_id = t.id ORDER BY step LIMIT 1) AS first_screenshot "
+            "FROM tests t LEFT JOIN steps s ON s.test_id = t.id "
+            "WHERE t.run_id = ? GROUP BY t.id ORDER BY t.id",
+            (run_id,),
+        ).fetchall()
+
+    def failed_runs(self):
+        """Run ids with at least one failed test."""
+        rows = self.conn.execute("SELECT DISTINCT run_id FROM tests WHERE status = 'FAIL'")
+        return {row["run_id"] for row in rows}
+
+    def slowest_tests(self, runs=30, limit=10, framework=None):
+        return self.conn.execute(
+            f"SELECT suite, name, browser, COUNT(*) AS samples, "
+            f"AVG(duration) AS avg_duration, MAX(duration) AS max_duration "
+            f"FROM tests WHERE run_id IN ({RECENT_RUNS_SQL}) "
+            f"AND status IN ('PASS', 'FAIL') AND duration IS NOT NULL "
+            f"GROUP BY suite, name, browser ORDER BY avg_duration DESC LIMIT ?",
+            (framework, framework, runs, limit),
+        ).fetchall()
+
+    def flakiness(self, runs=30, framework=None):
+        """Tests with mixed outcomes over the last N runs.
+
+        flip_rate is the share of consecutive runs where the outcome changed;
+        retried tests count as one outcome per run (the last attempt). A test
+        that passed on a retry is flaky; one that failed all its attempts is
+        a hard failure and only listed when its outcomes are mixed.
+        """
+        rows = self.conn.execute(
+            f"SELECT t.suite, t.name, t.browser, t.run_id, t.status, MAX(t.attempt) AS attempts "
+            f"FROM tests t JOIN runs r ON r.run_id = t.run_id "
+            f"WHERE t.run_id IN ({RECENT_RUNS_SQL}) "
+            f"AND t.status IN ('PASS', 'FAIL') "
+            f"GROUP BY t.run_id, t.suite, t.name, t.browser ORDER BY r.started_at, r.rowid",
+            (framework, framework, runs),
+        ).fetchall()
+
+        history = {}
+        for row in rows:
+            history.setdefault((row["suite"], row["name"], row["browser"]), []).append(row)
+
+        results = []
+        for (suite, name, browser), outcomes in history.items():
+            statuses = [row["status"] for row in outcomes]
+            passed_on_retry = sum(1 for row in outcomes if row["attempts"] > 1 and row["status"] == "PASS")
+            hard_failures = sum(1 for row in outcomes if row["attempts"] > 1 and row["status"] == "FAIL")
+            if len(set(statuses)) < 2 and not passed_on_retry:
+                continue
+            flips = sum(1 for a, b in zip(statuses, statuses[1:]) if a != b)
+            results.append({
+                "suite": suite,
+                "name": name,
+                "browser": browser,
+                "runs": len(statuses),
+                "failures": statuses.count("FAIL"),
+                "passed_on_retry": passed_on_retry,
+                "hard_failures": hard_failures,
+                "flip_rate": flips / (len(statuses) - 1) if len(statuses) > 1 else 0.0,
+            })
+        results.sort(key=lambda result: (result["flip_rate"], result["failures"]), reverse=True)
+        return results
+
+    def duration_trend(self, name, runs=30, browser=None):
+        return self.conn.execute(
+            "SELECT r.run_id, r.started_at, t.browser, t.status, t.duration "
+            "FROM tests t JOIN runs r ON r.run_id = t.run_id "
+            "WHERE t.name = ? AND (? IS NULL OR t.browser = ?) AND t.status IN ('PASS', 'FAIL') "
+            "ORDER BY r.started_at DESC, r.rowid DESC LIMIT ?",
+            (name, browser, browser, runs),
+        ).fetchall()[::-1]
+
+
+def open_history(read_only=False, create=True):
+    """Open the run history, or None when disabled or unavailable.
+
+    With read_only (or create=False) a missing database is not created and
+    None is returned instead.
+    """
+    if os.environ.get("TEST_HISTORY", "1").lower() in ("0", "false", "no"):
+        return None
+    path = os.environ.get("TEST_HISTORY_DB", DEFAULT_DB_PATH)
+    if (read_only or not create) and not os.path.exists(path):
+        return None
+    try:
+        return RunHistory(path, read_only)
+    except sqlite3.Error as e:
+        print(f"Run history unavailable: {e}")
+        return None
+
+
+def _format_duration(seconds):
+    return "-" if seconds is None else f"{seconds:.2f}s"
+
+
+def _cmd_runs(history, args):
+    for row in history.recent_runs(args.limit, args.framework):
+        print(f"{row['run_id']:<36} {row['framework']:<7} {row['status'] or 'RUNNING':<8} "
+              f"{row['tests']:>4} tests {row['failed']:>3} failed")
+
+
+def _cmd_slowest(history, args):
+    print(f"Slowest tests over the last {args.runs} runs:")
+    for row in history.slowest_tests(args.runs, args.limit, args.framework):
+        print(f"  {_format_duration(row['avg_duration']):>9} avg  {_format_duration(row['max_duration']):>9} max  "
+              f"{row['samples']:>3}x  [{row['browser']}] {row['suite']} / {row['name']}")
+
+
+def _cmd_flaky(history, args):
+    results = history.flakiness(args.runs, args.framework)
+    if not results:
+        print(f"No flaky tests in the last {args.runs} runs")
+        return
+    print(f"Flaky tests over the last {args.runs} runs:")
+    for result in results:
+        print(f"  {result['flip_rate']:>6.0%} flips  {result['failures']:>3}/{result['runs']} failed  "
+              f"{result['passed_on_retry']:>3} passed on retry  {result['hard_failures']:>3} hard failures  "
+              f"[{result['browser']}] {result['suite']} / {result['name']}")
+
+
+def _cmd_trend(history, args):
+    rows = history.duration_trend(args.name, args.runs, args.browser)
+    if not rows:
+        print(f"No history for: {args.name}")
+        return
+    longest = max(row["duration"] or 0 for row in rows) or 1
+    for row in rows:
+        bar = "#" * int(40 * (row["duration"] or 0) / longest)
+        print(f"  {row['started_at']}  [{row['browser']}] {row['status']:<4} "
+              f"{_format_duration(row['duration']):>9} {bar}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the test run history.")
+    parser.add_argument("--db", default=os.environ.get("TEST_HISTORY_DB", DEFAULT_DB_PATH))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    runs = subparsers.add_parser("runs", help="List recent runs")
+    runs.add_argument("--limit", type=int, default=20)
+    runs.add_argument("--framework", choices=["robot", "pytest"])
+    runs.set_defaults(func=_cmd_runs)
+
+    slowest = subparsers.add_parser("slowest", help="Slowest tests by average duration")
+    slowest.add_argument("--runs", type=int, default=30)
+    slowest.add_argument("--limit", type=int, default=10)
+    slowest.add_argument("--framework", choices=["robot", "pytest"])
+    slowest.set_defaults(func=_cmd_slowest)
+
+    flaky = subparsers.add_parser("flaky", help="Tests with mixed outcomes")
+    flaky.add_argument("--runs", type=int, default=30)
+    flaky.add_argument("--framework", choices=["robot", "pytest"])
+    flaky.set_defaults(func=_cmd_flaky)
+
+    trend = subparsers.add_parser("trend", help="Duration trend of one test")
+    trend.add_argument("name")
+    trend.add_argument("--runs", type=int, default=30)
+    trend.add_argument("--browser")
+    trend.set_defaults(func=_cmd_trend)
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"No run history at {args.db}")
+        return 1
+
+    history = RunHistory(args.db)
+    try:
+        args.func(history, args)
+    finally:
+        history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Screenshot index (index.html) of a pytest run folder.
+
+Written by the conftest at the end of a local session, and by the
+distributed coordinator once all workers have sent their results (the
+workers' own index files only cover their single test).
+"""
+
+import os
+import re
+from datetime import datetime
+
+import visual_diff
+
+ATTEMPT_DIR = re.compile(r"^attempt_(\d+)$")
+
+# Folders of a run that are not test folders
+SKIPPED_DIRS = ("failures", "videos", "results", visual_diff.OUTPUT_DIR_NAME)
+
+
+def history_tests(rows):
+    """Index entries from the run history rows of a run (see RunHistory.run_tests)."""
+    last_attempts = {}
+    for row in rows:
+        last_attempts[row["name"]] = max(last_attempts.get(row["name"], 1), row["attempt"])
+
+    tests = []
+    for row in rows:
+        status = row["status"]
+        if row["attempt"] < last_attempts[row["name"]]:
+            status = "RETRIED"
+        elif row["attempt"] > 1:
+            status = "FLAKY" if status == "PASS" else "HARD FAILURE"
+
+        name = row["name"]
+        first_screenshot = os.path.basename(row["first_screenshot"]) if row["first_screenshot"] else None
+        if row["attempt"] > 1:
+            name = f"{name} (attempt {row['attempt']})"
+            first_screenshot = f"attempt_{row['attempt']}/{first_screenshot}" if first_screenshot else None
+
+        tests.append({
+            "name": name,
+            "dir": row["name"],
+            "status": status,
+            "screenshot_count": row["steps"],
+            "has_screenshots": row["steps"] > 0,
+            "first_screenshot": first_screenshot
+        })
+    return tests
+
+
+def result_statuses(results):
+    """Final status per test name from parsed results in run order.
+
+    Retried tests appear more than once; they are reported like the
+    run history does (FLAKY / HARD FAILURE).
+    """
+    statuses = {}
+    attempts = {}
+    for result in results:
+        attempts[result["name"]] = attempts.get(result["name"], 0) + 1
+        status = result["status"]
+        if attempts[result["name"]] > 1:
+            status = "FLAKY" if status == "PASS" else "HARD FAILURE"
+        statuses[result["name"]] = status
+    return statuses
+
+
+def folder_tests(run_dir, statuses=None):
+    """Index entries from the test folders of a run (without run history).
+
+    statuses optionally maps test names to the status shown on their card.
+    """
+    statuses = statuses or {}
+    tests = []
+    for name in sorted(os.listdir(run_dir)):
+        test_dir = os.path.join(run_dir, name)
+        if not os.path.isdir(test_dir) or name in SKIPPED_DIRS:
+            continue
+
+        # Retries of a test are in attempt_N/ subfolders of its first attempt
+        retries = sorted((int(match.group(1)), entry) for entry in os.listdir(test_dir)
+                         if (match := ATTEMPT_DIR.match(entry)))
+        attempts = [("", name)] + [(f"{entry}/", f"{name} (attempt {number})") for number, entry in retries]
+
+        for index, (prefix, title) in enumerate(attempts):
+            status = statuses.get(name) if index == len(attempts) - 1 else "RETRIED"
+            folder = os.path.join(test_dir, prefix)
+            screenshots = sorted(entry for entry in os.listdir(folder) if entry.endswith(".png"))
+            tests.append({
+                "name": title,
+                "dir": name,
+                "status": status,
+                "screenshot_count": len(screenshots),
+                "has_screenshots": len(screenshots) > 0,
+                "first_screenshot": prefix + screenshots[0] if screenshots else None
+            })
+    return tests
+
+
+def write_index(run_dir, tests, visual_diff_link=False):
+    """Write <run_dir>/index.html for the given entries and return its path."""
+    run_id = os.path.basename(os.path.normpath(run_dir))
+    link = ""
+    if visual_diff_link:
+        link = f'<p><a href="./{visual_diff.OUTPUT_DIR_NAME}/summary.html" style="color: white;">🖼️ Visual diff report</a></p>'
+
+    html = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Test Run Report - {run_id}</title>
+    <style>
+        * {{ box-sizing: border-box; margin: 0; padding: 0; }}
+        body {{ 
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            background: #f5f5f5;
+            padding: 20px;
+        }}
+        .header {{ 
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 30px;
+            border-radius: 10px;
+            margin-bottom: 30px;
+        }}
+        .header h1 {{ font-size: 2em; margin-bottom: 10px; }}
+        .test-grid {{
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+            gap: 15px;
+        }}
+        .test-card {{
+            border: 1px solid #e0e0e0;
+            border-radius: 8px;
+            padding: 15px;
+            background: #fafafa;
+            transition: transform 0.2s;
+        }}
+        .test-card:hover {{
+            transform: translateY(-2px);
+            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
+        }}
+        .test-title {{
+            font-weight: bold;
+            margin-bottom: 10px;
+            color: #333;
+        }}
+        .screenshot-count {{
+            display: inline-block;
+            background: #667eea;
+            color: white;
+            padding: 3px 10px;
+            border-radius: 15px;
+            font-size: 0.8em;
+        }}
+        .view-btn {{
+            display: inline-block;
+            background: #4CAF50;
+            color: white;
+            padding: 8px 15px;
+            border-radius: 5px;
+            text-decoration: none;
+            margin-top: 10px;
+            font-size: 0.9em;
+        }}
+        .view-btn:hover {{ background: #45a049; }}
+        .summary {{
+            background: white;
+            border-radius: 10px;
+            padding: 20px;
+            margin-bottom: 20px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }}
+        .summary h2 {{ margin-bottom: 15px; color: #333; }}
+        .summary-grid {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
+            gap: 15px;
+        }}
+        .summary-item {{
+            text-align: center;
+            padding: 15px;
+            background: #f8f9fa;
+            border-radius: 8px;
+        }}
+        .summary-number {{
+            font-size: 2em;
+            font-weight: bold;
+            color: #667eea;
+        }}
+        .summary-label {{
+            color: #666;
+            font-size: 0.9em;
+            margin-top: 5px;
+        }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>🧪 Test Automation Report</h1>
+        <p>Run ID: <strong>{run_id}</strong></p>
+        <p>Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+        {link}
+    </div>
+    
+    <div class="summary">
+        <h2>📊 Summary</h2>
+        <div class="summary-grid">
+            <div class="summary-item">
+                <div class="summary-number">{len(tests)}</div>
+                <div class="summary-label">Total Tests</div>
+            </div>
+            <div class="summary-item">
+                <div class="summary-number">{sum(t['screenshot_count'] for t in tests)}</div>
+                <div class="summary-label">Screenshots</div>
+            </div>
+        </div>
+    </div>
+    
+    <div class="test-grid">
+"""
+    
+    for test in tests:
+        screenshot_link = f"./{test['dir']}/{test['first_screenshot']}" if test['has_screenshots'] else "#"
+        html += f"""
+        <div class="test-card">
+            <div class="test-title">{test['name']} {test['status'] or ''}</div>
+            <span class="screenshot-count">{test['screenshot_count']} screenshots</span>
+            <br>
+            <a href="{screenshot_link}" class="view-btn" target="_blank">View Screenshots</a>
+        </div>
+"""
+    
+    html += """
+    </div>
+</body>
+</html>"""
+
+    report_path = os.path.join(run_dir, "index.html")
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    return report_path
@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
-"""Cross-platform test runner script."""
+"""Cross-platform test runner script.
 
+Without options an interactive menu is shown. Distributed runs:
+
+    python run_tests.py --coordinator [--framework robot|pytest|all] [--bind HOST:PORT]
+    python run_tests.py --worker HOST:PORT
+    python run_tests.py --local-workers 4      (coordinator plus 4 local workers)
+"""
+
+import argparse
 import os
 import sys
 import subprocess
 
+import aggregate_results
+import browser_profiles
+import distributed
+import retention
+import visual_diff
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
@@ -16,7 +30,47 @@ def get_venv_python(venv_dir):
     return os.path.join(venv_dir, "bin", "python")
 
 
-def run_robot():
+def check_visual_regression(dir_path):
+    """Compare the latest run's screenshots with the approved visual baseline."""
+    # Baselines are captured with the default profile (an invalid one was already reported by the run)
+    try:
+        if browser_profiles.get_profile() != "default":
+            return
+    except ValueError:
+        return
+    
+    runs = retention.list_runs(os.path.join(dir_path, "test-output"))
+    if not runs:
+        return
+    
+    summary = visual_diff.check_latest_run(dir_path, runs[-1]["path"])
+    if summary is None:
+        return
+    
+    counts = ", ".join(f"{count} {status}" for status, count in sorted(summary["counts"].items()))
+    print(f"\nVisual diff: {counts}")
+    print(f"Report: {os.path.join(runs[-1]['path'], visual_diff.OUTPUT_DIR_NAME, 'summary.html')}")
+
+
+def clean_test_output(dir_path):
+    """Apply test-output retention rules after a run."""
+    output_dir = os.path.join(dir_path, "test-output")
+    result = retention.apply_retention(output_dir, **retention.policy_from_env())
+    if result["removed"] or result["archived"]:
+        print(f"\nTest output cleanup: {len(result['removed'])} removed, "
+              f"{len(result['archived'])} archived, {result['kept']} kept")
+
+
+def summarize_results(frameworks):
+    """Print and save the combined results of the given frameworks."""
+    summary = aggregate_results.aggregate(
+        {framework: aggregate_results.RESULT_FILES[framework] for framework in frameworks})
+    aggregate_results.print_summary(summary)
+    if summary["frameworks"]:
+        print(f"Summary: {aggregate_results.write_summary(summary)}")
+
+
+def run_robot(summarize=True):
     """Run Robot Framework tests."""
     dir_path = os.path.join(PROJECT_ROOT, "automation", "python", "robotframework")
     venv_dir = os.path.join(dir_path, "venv")
@@ -29,9 +83,14 @@ def run_robot():
         subprocess.run([python_exe, "-m", "robot", "--outputdir", "results", "tests/"])
     else:
         subprocess.run(["robot", "--outputdir", "results", "tests/"])
+    
+    check_visual_regression(dir_path)
+    clean_test_output(dir_path)
+    if summarize:
+        summarize_results(["robot"])
 
 
-def run_pytest():
+def run_pytest(summarize=True):
     """Run pytest tests."""
     dir_path = os.path.join(PROJECT_ROOT, "automation", "python", "playwright")
     venv_dir = os.path.join(dir_path, "venv")
@@ -40,16 +99,27 @@ def run_pytest():
     
     if os.path.exists(venv_dir):
         python_exe = get_venv_python(venv_dir)
-        subprocess.run([python_exe, "-m", "pytest", "-v", "--html=results/report.html", "--self-contained-html"])
+        subprocess.run([python_exe, "-m", "pytest", "-v", "--html=results/report.html", "--self-contained-html",
+                        "--junitxml=results/junit.xml"])
     else:
-        subprocess.run(["pytest", "-v", "--html=results/report.html", "--self-contained-html"])
+        subprocess.run(["pytest", "-v", "--html=results/report.html", "--self-contained-html",
+                        "--junitxml=results/junit.xml"])
+    
+    check_visual_regression(dir_path)
+    clean_test_output(dir_path)
+    if summarize:
+        summarize_results(["pytest"])
 
 
-def run_typescript():
+def run_typescript(summarize=True):
     """Run TypeScript Playwright tests."""
     dir_path = os.path.join(PROJECT_ROOT, "automation", "typescript")
     os.chdir(dir_path)
     subprocess.run(["npm", "test"])
+    check_visual_regression(dir_path)
+    clean_test_output(dir_path)
+    if summarize:
+        summarize_results(["typescript"])
 
 
 def run_all():
@@ -57,30 +127,92 @@ def run_all():
     print("\n" + "="*50)
     print("Running: Python Robot Framework")
     print("="*50 + "\n")
-    run_robot()
+    run_robot(summarize=False)
     
     print("\n" + "="*50)
     print("Running: Python pytest")
     print("="*50 + "\n")
-    run_pytest()
+    run_pytest(summarize=False)
     
     print("\n" + "="*50)
     print("Running: TypeScript Playwright")
     print("="*50 + "\n")
-    run_typescript()
+    run_typescript(summarize=False)
+    
+    summarize_results(["robot", "pytest", "typescript"])
 
 
-def main():
+def run_watch():
+    """Start watch mode: re-run changed tests on save with a warm browser."""
+    framework = input("Framework to watch (robot/pytest): ").strip().lower()
+    if framework not in ("robot", "pytest"):
+        print("Invalid framework")
+        return
+    
+    folder = "robotframework" if framework == "robot" else "playwright"
+    dir_path = os.path.join(PROJECT_ROOT, "automation", "python", folder)
+    venv_dir = os.path.join(dir_path, "venv")
+    python_exe = get_venv_python(venv_dir) if os.path.exists(venv_dir) else sys.executable
+    
+    try:
+        subprocess.run([python_exe, os.path.join(SCRIPT_DIR, "watch_daemon.py"), framework], cwd=dir_path)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_distributed(frameworks, bind, url=None, local_workers=0, token=None):
+    """Run tests on workers, then check and clean each framework's output."""
+    try:
+        summary = distributed.run_coordinator(frameworks, bind, url, local_workers, token)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    aggregate_results.print_summary(summary)
+    if summary["frameworks"]:
+        print(f"Summary: {aggregate_results.write_summary(summary)}")
+    
+    for framework in frameworks:
+        check_visual_regression(distributed.FRAMEWORK_DIRS[framework])
+        clean_test_output(distributed.FRAMEWORK_DIRS[framework])
+    return 1 if summary["totals"]["failed"] else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the test suites (interactive menu without options).")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--coordinator", action="store_true", help="Serve the tests to workers")
+    mode.add_argument("--worker", metavar="HOST:PORT", help="Run tests from a coordinator")
+    parser.add_argument("--local-workers", type=int, default=0, metavar="N",
+                        help="Start N local workers (implies --coordinator)")
+    parser.add_argument("--framework", choices=["robot", "pytest", "all"], default="all",
+                        help="Suites to distribute (default: all)")
+    parser.add_argument("--bind", default=distributed.DEFAULT_BIND,
+                        help="Coordinator address (default: %(default)s; other hosts need a token)")
+    parser.add_argument("--token", help=f"Shared coordinator token (default: ${distributed.TOKEN_ENV})")
+    parser.add_argument("--url", help="App URL for the tests (default: production)")
+    parser.add_argument("--name", help="Worker name (default: <host>-<pid>)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        return distributed.run_worker(args.worker, args.name, args.token)
+    if args.coordinator or args.local_workers:
+        frameworks = ["robot", "pytest"] if args.framework == "all" else [args.framework]
+        return run_distributed(frameworks, args.bind, args.url, args.local_workers, args.token)
+    
     while True:
         print("\n=== Run Tests ===")
         print("1. Python Robot Framework")
         print("2. Python pytest (Playwright)")
         print("3. TypeScript Playwright")
         print("4. Run All")
-        print("5. Exit")
+        print("5. Watch Mode (re-run changed tests)")
+        print("6. Exit")
         print()
         
-        choice = input("Select option (1-5): ").strip()
+        choice = input("Select option (1-6): ").strip()
         
         if choice == "1":
             run_robot()
@@ -91,6 +223,8 @@ def main():
         elif choice == "4":
             run_all()
         elif choice == "5":
+            run_watch()
+        elif choice == "6":
             print("Goodbye!")
             break
         else:
@@ -98,4 +232,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Result parsing and the combined summary of aggregate_results.py.
+
+Run from the repository root:
+
+    python -m pytest automation/tests
+"""
+
+import os
+import sys
+
+import pytest
+
+AUTOMATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AUTOMATION_DIR not in sys.path:
+    sys.path.insert(0, AUTOMATION_DIR)
+
+import aggregate_results  # noqa: E402
+
+# Robot Framework 6: starttime/endtime; a failed attempt retried by the library
+# is SKIP (tagged retried) and re-run at the end of its suite
+ROBOT_6_OUTPUT = """<?xml version="1.0" encoding="UTF-8"?>
+<robot generator="Robot 6.1.1 (Python 3.11.4 on linux)" generated="20260214 10:30:00.000" rpa="false" schemaversion="4">
+<suite id="s1" name="Tests" source="/automation/python/robotframework/tests">
+<suite id="s1-s1" name="Web" source="/automation/python/robotframework/tests/web">
+<suite id="s1-s1-s1" name="Todo Tests" source="/automation/python/robotframework/tests/web/todo_tests.robot">
+<test id="s1-s1-s1-t1" name="Login And Add Todo" line="10">
+<kw name="Open Todo App" library="CustomKeywordsLibrary">
+<msg timestamp="20260214 10:30:00.100" level="INFO">Opened</msg>
+<status status="PASS" starttime="20260214 10:30:00.000" endtime="20260214 10:30:01.000"/>
+</kw>
+<status status="PASS" starttime="20260214 10:30:00.000" endtime="20260214 10:30:02.500"/>
+</test>
+<test id="s1-s1-s1-t2" name="Edit Todo" line="20">
+<kw name="Click Element" library="CustomKeywordsLibrary">
+<status status="FAIL" starttime="20260214 10:30:02.500" endtime="20260214 10:30:03.000">Element not found</status>
+</kw>
+<tag>retried</tag>
+<status status="SKIP" starttime="20260214 10:30:02.500" endtime="20260214 10:30:03.000">Retried (attempt 1 failed): Element not found</status>
+</test>
+<test id="s1-s1-s1-t3" name="Edit Todo" line="20">
+<tag>flaky</tag>
+<status status="PASS" starttime="20260214 10:30:03.000" endtime="20260214 10:30:04.250">Flaky: passed on attempt 2</status>
+</test>
+<status status="PASS" starttime="20260214 10:30:00.000" endtime="20260214 10:30:04.250"/>
+</suite>
+<status status="PASS" starttime="20260214 10:30:00.000" endtime="20260214 10:30:04.250"/>
+</suite>
+<status status="PASS" starttime="20260214 10:30:00.000" endtime="20260214 10:30:04.250"/>
+</suite>
+</robot>
+"""
+
+# Robot Framework 7: start/elapsed
+ROBOT_7_OUTPUT = """<?xml version="1.0" encoding="UTF-8"?>
+<robot generator="Robot 7.0 (Python 3.11.4 on linux)" generated="2026-02-14T10:30:00.000000" rpa="false" schemaversion="5">
+<suite id="s1" name="Todo Tests" source="/automation/python/robotframework/tests/web/todo_tests.robot">
+<test id="s1-t1" name="Delete Todo" line="30">
+<kw name="Click Element" owner="CustomKeywordsLibrary">
+<msg time="2026-02-14T10:30:00.100000" level="FAIL">Element not found</msg>
+<status status="FAIL" start="2026-02-14T10:30:00.000000" elapsed="0.500"/>
+</kw>
+<tag>retried</tag>
+<status status="SKIP" start="2026-02-14T10:30:00.000000" elapsed="0.750">Retried (attempt 1 failed): Element not found</status>
+</test>
+<test id="s1-t2" name="Delete Todo" line="30">
+<kw name="Click Element" owner="CustomKeywordsLibrary">
+<status status="FAIL" start="2026-02-14T10:30:00.750000" elapsed="0.500">Element not found</status>
+</kw>
+<tag>hard-failure</tag>
+<status status="FAIL" start="2026-02-14T10:30:00.750000" elapsed="0.800">Element not found</status>
+</test>
+<test id="s1-t3" name="Toggle Todo" line="40">
+<status status="PASS" start="2026-02-14T10:30:01.550000" elapsed="1.250"/>
+</test>
+<status status="FAIL" start="2026-02-14T10:30:00.000000" elapsed="2.800"/>
+</suite>
+</robot>
+"""
+
+PYTEST_JUNIT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" errors="0" failures="0" skipped="1" tests="3" time="6.0">
+<testcase classname="test_todo_app.TestTodos" name="test_add_new_todo[chromium]" time="2.000"/>
+<testcase classname="test_todo_app.TestTodos" name="test_edit_todo[firefox]" time="1.000">
+<skipped type="pytest.skip" message="Retried (attempt 1 failed): AssertionError">test_todo_app.py:80</skipped>
+</testcase>
+<testcase classname="test_todo_app.TestTodos" name="test_edit_todo[firefox]" time="3.000"/>
+</testsuite></testsuites>
+"""
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_parse_robot_6_output(tmp_path):
+    results = list(aggregate_results.parse_robot_output(write(tmp_path, "output.xml", ROBOT_6_OUTPUT)))
+
+    assert [(r["suite"], r["name"], r["status"], r["duration"]) for r in results] == [
+        ("Tests.Web.Todo Tests", "Login And Add Todo", "PASS", 2.5),
+        ("Tests.Web.Todo Tests", "Edit Todo", "SKIP", 0.5),
+        ("Tests.Web.Todo Tests", "Edit Todo", "PASS", 1.25),
+    ]
+    assert results[0]["message"] is None
+    assert results[1]["message"] == "Retried (attempt 1 failed): Element not found"
+    assert {r["framework"] for r in results} == {"robot"}
+
+
+def test_parse_robot_7_output(tmp_path):
+    results = list(aggregate_results.parse_robot_output(write(tmp_path, "output.xml", ROBOT_7_OUTPUT)))
+
+    assert [(r["suite"], r["name"], r["status"], r["duration"]) for r in results] == [
+        ("Todo Tests", "Delete Todo", "SKIP", 0.75),
+        ("Todo Tests", "Delete Todo", "FAIL", 0.8),
+        ("Todo Tests", "Toggle Todo", "PASS", 1.25),
+    ]
+    assert results[1]["message"] == "Element not found"
+
+
+def test_parse_pytest_junit_reads_browser_from_test_id(tmp_path):
+    results = list(aggregate_results.parse_results("pytest", write(tmp_path, "junit.xml", PYTEST_JUNIT)))
+
+    assert [(r["browser"], r["name"], r["status"]) for r in results] == [
+        ("chromium", "test_add_new_todo[chromium]", "PASS"),
+        ("firefox", "test_edit_todo[firefox]", "SKIP"),
+        ("firefox", "test_edit_todo[firefox]", "PASS"),
+    ]
+    assert results[1]["message"] == "Retried (attempt 1 failed): AssertionError"
+
+
+def test_retried_tests_count_once_with_their_final_result(tmp_path):
+    summary = aggregate_results.aggregate({
+        "robot": write(tmp_path, "output.xml", ROBOT_7_OUTPUT),
+        "pytest": write(tmp_path, "junit.xml", PYTEST_JUNIT),
+        "typescript": str(tmp_path / "missing.xml"),
+    })
+
+    assert set(summary["sources"]) == {"robot", "pytest"}
+    assert summary["frameworks"]["robot"] == {
+        "total": 2, "passed": 1, "failed": 1, "skipped": 0, "flaky": 0, "duration": 2.05,
+    }
+    assert summary["frameworks"]["pytest"] == {
+        "total": 2, "passed": 2, "failed": 0, "skipped": 0, "flaky": 1, "duration": 5.0,
+    }
+    assert summary["totals"]["total"] == 4
+    assert summary["totals"]["flaky"] == 1
+    attempts = {test["name"]: test["attempts"] for test in summary["tests"]}
+    assert attempts == {"Delete Todo": 2, "Toggle Todo": 1, "test_add_new_todo[chromium]": 1,
+                        "test_edit_todo[firefox]": 2}
+
+
+def test_robot_6_retry_is_flaky(tmp_path):
+    summary = aggregate_results.aggregate({"robot": write(tmp_path, "output.xml", ROBOT_6_OUTPUT)})
+
+    assert summary["frameworks"]["robot"]["total"] == 2
+    assert summary["frameworks"]["robot"]["flaky"] == 1
+    assert summary["slowest"][0]["name"] == "Login And Add Todo"
+    assert summary["slowest"][0]["duration"] == pytest.approx(2.5)
@@ -0,0 +1,204 @@
+"""Coordinator and worker tests for distributed.py with a fake test runner.
+
+Run from the repository root:
+
+    python -m pytest automation/tests
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+import urllib.error
+import zipfile
+
+import pytest
+
+AUTOMATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AUTOMATION_DIR not in sys.path:
+    sys.path.insert(0, AUTOMATION_DIR)
+
+import distributed  # noqa: E402
+
+RUN_IDS = {"pytest": "Run_2026-01-01_00-00-00"}
+TOKEN = "shared-secret"
+
+
+def make_items(count):
+    return [
+        {"framework": "pytest", "source": "test_todo_app.py", "test": f"test_{number}", "id": number, "attempts": 0}
+        for number in range(1, count + 1)
+    ]
+
+
+def fake_run_test(item, run_id, url, workdir):
+    """Write one screenshot like the conftest does and report a pass."""
+    name = f"{item['test']}[chromium]"
+    test_dir = os.path.join(workdir, "test-output", run_id, name)
+    os.makedirs(test_dir)
+    with open(os.path.join(test_dir, "01_open.png"), "wb") as f:
+        f.write(b"png")
+    time.sleep(0.05)
+    test = {"framework": "pytest", "browser": "chromium", "suite": "test_todo_app", "name": name,
+            "status": "PASS", "duration": 0.05, "message": None}
+    return [test], "1 passed"
+
+
+def artifacts(name="test_1[chromium]", files=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr(f"{name}/01_open.png", b"png")
+        for member, content in (files or {}).items():
+            zf.writestr(member, content)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def framework_dirs(tmp_path, monkeypatch):
+    """Keep run folders and history out of the checkout."""
+    monkeypatch.setenv("TEST_HISTORY", "0")
+    monkeypatch.setitem(distributed.FRAMEWORK_DIRS, "pytest", str(tmp_path / "playwright"))
+    monkeypatch.setattr(distributed, "run_test", fake_run_test)
+    monkeypatch.setattr(distributed, "POLL_INTERVAL", 0.05)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(coordinator, token=TOKEN):
+        server = distributed.start_server(coordinator, "127.0.0.1:0", token)
+        servers.append(server)
+        return "127.0.0.1:{}".format(server.server_address[1])
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_workers_complete_every_item_once(serve):
+    coordinator = distributed.Coordinator(make_items(7), RUN_IDS)
+    address = serve(coordinator)
+
+    exit_codes = []
+    workers = [
+        threading.Thread(target=lambda name=name: exit_codes.append(distributed.run_worker(address, name, TOKEN)))
+        for name in ("worker-1", "worker-2", "worker-3")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert exit_codes == [0, 0, 0]
+    assert coordinator.finished.is_set()
+    assert coordinator.completed == 7
+    names = sorted(test["name"] for test in coordinator.results)
+    assert names == sorted(f"test_{number}[chromium]" for number in range(1, 8))
+
+    run_dir = distributed.run_dir("pytest", RUN_IDS["pytest"])
+    for name in names:
+        assert os.path.exists(os.path.join(run_dir, name, "01_open.png"))
+
+    with open(coordinator.write_report(), encoding="utf-8") as f:
+        report = f.read()
+    assert report.count('class="test-card"') == 7
+    assert "test_7[chromium] PASS" in report
+
+
+def test_expired_lease_is_requeued_and_stale_calls_are_rejected():
+    coordinator = distributed.Coordinator(make_items(1), RUN_IDS, lease_timeout=0.05)
+    lost = coordinator.lease("lost-worker")
+    time.sleep(0.1)
+
+    retry = coordinator.lease("other-worker")
+    assert retry["item"]["id"] == lost["item"]["id"]
+    assert retry["item"]["attempts"] == 2
+    assert retry["lease"] != lost["lease"]
+
+    assert coordinator.heartbeat(lost["lease"]) is False
+    assert coordinator.store_artifacts(lost["lease"], artifacts()) is False
+    assert coordinator.complete(lost["lease"], {"tests": []}) is False
+    assert not os.path.exists(os.path.join(distributed.run_dir("pytest", RUN_IDS["pytest"]), "test_1[chromium]"))
+
+    assert coordinator.complete(retry["lease"], {"tests": []}) is True
+    assert coordinator.completed == 1
+    assert coordinator.lease("other-worker") == {"done": True}
+
+
+def test_lease_does_not_expire_while_unpacking(monkeypatch):
+    coordinator = distributed.Coordinator(make_items(1), RUN_IDS, lease_timeout=0.05)
+    reply = coordinator.lease("slow-disk")
+    copy = distributed.shutil.copyfileobj
+
+    def slow_copy(src, dst):
+        time.sleep(0.1)
+        coordinator.reap()
+        copy(src, dst)
+
+    monkeypatch.setattr(distributed.shutil, "copyfileobj", slow_copy)
+    assert coordinator.store_artifacts(reply["lease"], artifacts()) is True
+    assert coordinator.pending == distributed.deque()
+    assert coordinator.complete(reply["lease"], {"tests": []}) is True
+
+
+def test_worker_logs_are_appended():
+    coordinator = distributed.Coordinator(make_items(2), RUN_IDS)
+    for number in (1, 2):
+        reply = coordinator.lease(f"worker-{number}")
+        files = {
+            "failures.txt": f"chromium\ttest_{number}\n",
+            "memory.csv": f"time,test,event\n2026-01-01T00:00:0{number},test_{number},end_test\n",
+        }
+        assert coordinator.store_artifacts(reply["lease"], artifacts(f"test_{number}[chromium]", files)) is True
+
+    run_dir = distributed.run_dir("pytest", RUN_IDS["pytest"])
+    with open(os.path.join(run_dir, "failures.txt"), encoding="utf-8") as f:
+        assert f.read() == "chromium\ttest_1\nchromium\ttest_2\n"
+    with open(os.path.join(run_dir, "memory.csv"), encoding="utf-8") as f:
+        assert f.read().splitlines() == [
+            "time,test,event",
+            "2026-01-01T00:00:01,test_1,end_test",
+            "2026-01-01T00:00:02,test_2,end_test",
+        ]
+
+
+def test_lost_item_fails_after_max_attempts():
+    coordinator = distributed.Coordinator(make_items(1), RUN_IDS, lease_timeout=0.01)
+    for attempt in range(1, distributed.MAX_ATTEMPTS + 1):
+        reply = coordinator.lease(f"worker-{attempt}")
+        assert reply["item"]["attempts"] == attempt
+        time.sleep(0.03)
+        coordinator.reap()
+
+    assert coordinator.lease("late-worker") == {"done": True}
+    assert coordinator.finished.is_set()
+    assert [(test["status"], test["message"]) for test in coordinator.results] == [
+        ("FAIL", f"Worker lost {distributed.MAX_ATTEMPTS} times"),
+    ]
+
+
+def test_requests_need_the_token(serve):
+    coordinator = distributed.Coordinator(make_items(1), RUN_IDS)
+    url = "http://" + serve(coordinator)
+
+    for token in (None, "wrong"):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            distributed._post(f"{url}/lease", {"worker": "intruder"}, token=token)
+        assert error.value.code == 401
+    assert coordinator.pending and not coordinator.leases
+
+    assert distributed.run_worker(url, "intruder", "wrong") == 1
+    assert "lease" in distributed._post(f"{url}/lease", {"worker": "trusted"}, token=TOKEN)
+
+
+def test_binding_beyond_loopback_needs_a_token():
+    distributed.check_bind("127.0.0.1:8765", None)
+    distributed.check_bind("localhost:8765", None)
+    distributed.check_bind("0.0.0.0:8765", TOKEN)
+    with pytest.raises(ValueError):
+        distributed.check_bind("0.0.0.0:8765", None)
+    with pytest.raises(ValueError):
+        distributed.check_bind("192.168.1.20:8765", None)
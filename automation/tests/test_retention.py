@@ -0,0 +1,204 @@
+"""Retention rules, failure markers, history cleanup and archives of retention.py.
+
+Run from the repository root:
+
+    python -m pytest automation/tests
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+AUTOMATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AUTOMATION_DIR not in sys.path:
+    sys.path.insert(0, AUTOMATION_DIR)
+
+import retention  # noqa: E402
+import run_history  # noqa: E402
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+TYPESCRIPT_JUNIT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="todo.spec.ts" hostname="firefox" tests="2">
+    <testcase name="adds a todo" classname="todo.spec.ts" time="1.5"/>
+    <testcase name="edits a todo" classname="todo.spec.ts" time="2.0">
+      <failure message="expected Updated todo text"/>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+def make_run(output_dir, days_ago, number=1, files=None):
+    """Create a Robot-style run folder started days_ago before NOW."""
+    started = NOW - timedelta(days=days_ago)
+    name = f"{started.strftime(retention.TIMESTAMP_FORMAT)}_Run_{number:03d}"
+    path = os.path.join(output_dir, name)
+    for member, content in (files or {"chromium/01_Login/01_page_loaded.png": b"png"}).items():
+        os.makedirs(os.path.dirname(os.path.join(path, member)), exist_ok=True)
+        with open(os.path.join(path, member), "wb") as f:
+            f.write(content)
+    return name
+
+
+def fake_runs(*specs):
+    """Runs as list_runs returns them, from (days ago, failed) pairs, oldest first."""
+    return [
+        {"name": f"run-{number}", "path": None, "started": NOW - timedelta(days=days_ago), "failed": failed}
+        for number, (days_ago, failed) in enumerate(specs, 1)
+    ]
+
+
+@pytest.fixture
+def history_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.db")
+    monkeypatch.setenv("TEST_HISTORY_DB", path)
+    monkeypatch.delenv("TEST_HISTORY", raising=False)
+    return path
+
+
+@pytest.fixture
+def no_history(monkeypatch):
+    monkeypatch.setenv("TEST_HISTORY", "0")
+
+
+def names(runs):
+    return [run["name"] for run in runs]
+
+
+def test_keep_last_keeps_the_newest_runs():
+    runs = fake_runs((5, False), (4, False), (3, False), (2, False), (1, False))
+
+    assert names(retention.select_expired(runs, keep_last=2, max_age_days=None, now=NOW)) == [
+        "run-1", "run-2", "run-3",
+    ]
+    assert retention.select_expired(runs, keep_last=5, max_age_days=None, now=NOW) == []
+
+
+def test_keep_failed_applies_until_max_age():
+    runs = fake_runs((40, True), (20, True), (10, False), (1, False))
+
+    expired = retention.select_expired(runs, keep_last=1, max_age_days=30, keep_failed=True, now=NOW)
+    assert names(expired) == ["run-1", "run-3"]
+
+    expired = retention.select_expired(runs, keep_last=1, max_age_days=30, keep_failed=False, now=NOW)
+    assert names(expired) == ["run-1", "run-2", "run-3"]
+
+
+def test_newest_runs_are_kept_even_when_too_old():
+    runs = fake_runs((90, False), (60, False))
+
+    assert names(retention.select_expired(runs, keep_last=1, max_age_days=30, now=NOW)) == ["run-1"]
+
+
+def test_list_runs_skips_other_entries_and_reads_markers(tmp_path):
+    output_dir = str(tmp_path)
+    failed = make_run(output_dir, 3, files={"failures.txt": b"chromium\tLogin\n"})
+    passed = make_run(output_dir, 2, number=2)
+    pytest_run = f"Run_{(NOW - timedelta(days=1)).strftime(retention.TIMESTAMP_FORMAT)}"
+    os.makedirs(os.path.join(output_dir, pytest_run))
+    os.makedirs(os.path.join(output_dir, retention.ARCHIVE_DIR_NAME))
+    os.makedirs(os.path.join(output_dir, "not-a-run"))
+    os.symlink(os.path.join(output_dir, passed), os.path.join(output_dir, "latest"))
+
+    runs = retention.list_runs(output_dir, failed_runs={pytest_run})
+    assert [(run["name"], run["failed"]) for run in runs] == [(failed, True), (passed, False), (pytest_run, True)]
+
+
+def test_typescript_failures_are_marked_on_the_run_that_wrote_junit(tmp_path, monkeypatch, no_history):
+    output_dir = str(tmp_path / "test-output")
+    older = make_run(output_dir, 2)
+    newer = make_run(output_dir, 1, number=2)
+    junit_path = str(tmp_path / "junit.xml")
+    with open(junit_path, "w", encoding="utf-8") as f:
+        f.write(TYPESCRIPT_JUNIT)
+    written = (NOW - timedelta(hours=12)).timestamp()
+    os.utime(junit_path, (written, written))
+    monkeypatch.setattr(retention, "JUNIT_RESULTS", {os.path.abspath(output_dir): ("typescript", junit_path)})
+
+    run, failures = retention.junit_failures(retention.list_runs(output_dir), "typescript", junit_path)
+    assert run["name"] == newer
+    assert failures == [("firefox", "edits a todo")]
+
+    # A dry run reports the run as kept but leaves no marker
+    result = retention.apply_retention(output_dir, keep_last=0, max_age_days=None, dry_run=True)
+    assert result["removed"] == [older]
+    assert not os.path.exists(os.path.join(output_dir, newer, "failures.txt"))
+
+    result = retention.apply_retention(output_dir, keep_last=0, max_age_days=None)
+    assert result == {"removed": [older], "archived": [], "kept": 1}
+    with open(os.path.join(output_dir, newer, "failures.txt"), encoding="utf-8") as f:
+        assert f.read() == "firefox\tedits a todo\n"
+
+
+def test_junit_written_before_every_run_is_ignored(tmp_path):
+    output_dir = str(tmp_path / "test-output")
+    make_run(output_dir, 1)
+    junit_path = str(tmp_path / "junit.xml")
+    with open(junit_path, "w", encoding="utf-8") as f:
+        f.write(TYPESCRIPT_JUNIT)
+    written = (NOW - timedelta(days=2)).timestamp()
+    os.utime(junit_path, (written, written))
+
+    assert retention.junit_failures(retention.list_runs(output_dir), "typescript", junit_path) == (None, [])
+
+
+def test_history_rows_are_removed_only_for_deleted_runs(tmp_path, history_db):
+    output_dir = str(tmp_path / "test-output")
+    old_passed = make_run(output_dir, 3)
+    old_failed = make_run(output_dir, 2, number=2)
+    newest = make_run(output_dir, 1, number=3)
+    history = run_history.open_history()
+    for name, status in ((old_passed, "PASS"), (old_failed, "FAIL"), (newest, "PASS")):
+        history.start_run(name, "robot", os.path.join(output_dir, name))
+        test_id = history.start_test(name, "Todo Tests", "Login", "chromium")
+        history.finish_test(test_id, status, 1.0)
+        history.finish_run(name)
+    history.close()
+
+    result = retention.apply_retention(output_dir, keep_last=1, max_age_days=None)
+    assert result == {"removed": [old_passed], "archived": [], "kept": 2}
+    assert not os.path.exists(os.path.join(output_dir, old_passed))
+
+    history = run_history.open_history(read_only=True)
+    assert sorted(run["run_id"] for run in history.recent_runs()) == sorted([old_failed, newest])
+    history.close()
+
+
+def test_archived_runs_keep_their_history_and_can_be_extracted(tmp_path, history_db):
+    output_dir = str(tmp_path / "test-output")
+    files = {
+        "chromium/01_Login/01_page_loaded.png": b"\x89PNG screenshot",
+        "chromium/01_Login/metrics.json": b'{"steps": []}',
+    }
+    archived = make_run(output_dir, 2, files=files)
+    make_run(output_dir, 1, number=2)
+    history = run_history.open_history()
+    history.start_run(archived, "robot", os.path.join(output_dir, archived))
+    history.finish_run(archived)
+    history.close()
+
+    result = retention.apply_retention(output_dir, keep_last=1, max_age_days=None, archive=True)
+    assert result == {"removed": [], "archived": [archived], "kept": 1}
+    assert not os.path.exists(os.path.join(output_dir, archived))
+
+    index = retention.load_index(os.path.join(output_dir, retention.ARCHIVE_DIR_NAME))
+    assert sorted(index[archived]["files"]) == sorted(files)
+    assert index[archived]["failed"] is False
+
+    dest = str(tmp_path / "extracted")
+    for member, content in files.items():
+        path = retention.extract_file(output_dir, archived, member, dest)
+        with open(path, "rb") as f:
+            assert f.read() == content
+    with pytest.raises(KeyError):
+        retention.extract_file(output_dir, archived, "chromium/missing.png", dest)
+    with pytest.raises(KeyError):
+        retention.extract_file(output_dir, "2020-01-01_00-00-00_Run_001", "any.png", dest)
+
+    history = run_history.open_history(read_only=True)
+    assert [run["run_id"] for run in history.recent_runs()] == [archived]
+    history.close()
@@ -0,0 +1,70 @@
+"""Run history queries over retried tests.
+
+Run from the repository root:
+
+    python -m pytest automation/tests
+"""
+
+import os
+import sys
+
+import pytest
+
+AUTOMATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AUTOMATION_DIR not in sys.path:
+    sys.path.insert(0, AUTOMATION_DIR)
+
+import run_history  # noqa: E402
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = run_history.RunHistory(str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+
+def record_run(history, run_id, attempts):
+    """Record a run; attempts maps test names to their statuses in attempt order."""
+    history.start_run(run_id, "pytest", f"/output/{run_id}")
+    for name, statuses in attempts.items():
+        for attempt, status in enumerate(statuses, 1):
+            test_id = history.start_test(run_id, "test_todo_app.py", name, "chromium", attempt)
+            history.finish_test(test_id, status, 1.0)
+    history.finish_run(run_id)
+
+
+def test_run_passed_on_retry_is_not_failed(history):
+    record_run(history, "Run_1", {"test_add": ["RETRIED", "PASS"], "test_edit": ["PASS"]})
+
+    [run] = history.recent_runs()
+    assert run["status"] == "PASS"
+    assert (run["tests"], run["failed"]) == (2, 0)
+    assert history.failed_runs() == set()
+
+
+def test_run_failing_all_attempts_is_failed(history):
+    record_run(history, "Run_1", {"test_add": ["RETRIED", "RETRIED", "FAIL"]})
+
+    [run] = history.recent_runs()
+    assert run["status"] == "FAIL"
+    assert (run["tests"], run["failed"]) == (1, 1)
+    assert history.failed_runs() == {"Run_1"}
+
+
+def test_flaky_lists_passes_on_retry_but_not_hard_failures(history):
+    record_run(history, "Run_1", {"test_add": ["RETRIED", "PASS"], "test_edit": ["RETRIED", "FAIL"]})
+    record_run(history, "Run_2", {"test_add": ["PASS"], "test_edit": ["RETRIED", "FAIL"]})
+
+    [flaky] = history.flakiness()
+    assert flaky["name"] == "test_add"
+    assert (flaky["runs"], flaky["failures"], flaky["passed_on_retry"], flaky["hard_failures"]) == (2, 0, 1, 0)
+
+
+def test_flaky_counts_hard_failures_of_mixed_tests(history):
+    record_run(history, "Run_1", {"test_edit": ["PASS"]})
+    record_run(history, "Run_2", {"test_edit": ["RETRIED", "FAIL"]})
+
+    [flaky] = history.flakiness()
+    assert (flaky["failures"], flaky["passed_on_retry"], flaky["hard_failures"]) == (1, 0, 1)
+    assert flaky["flip_rate"] == 1.0
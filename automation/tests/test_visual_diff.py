@@ -0,0 +1,140 @@
+"""Image comparison, ignore masks and run comparison of visual_diff.py.
+
+Run from the repository root (needs numpy and Pillow, skipped without):
+
+    python -m pytest automation/tests
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+AUTOMATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AUTOMATION_DIR not in sys.path:
+    sys.path.insert(0, AUTOMATION_DIR)
+
+import visual_diff  # noqa: E402
+
+SCREENSHOT = "chromium/01_Login_And_Add_Todo/01_page_loaded.png"
+
+
+def blank(height=200, width=200, value=255):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def with_patch(image, x, y, size, value=0):
+    image = image.copy()
+    image[y:y + size, x:x + size] = value
+    return image
+
+
+def save(root, rel_path, image):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(image).save(path)
+
+
+def test_identical_images_have_no_changes():
+    changed, diff, region_scores, unmasked = visual_diff.compare_images(blank(), blank())
+
+    assert not changed.any()
+    assert diff.max() == 0
+    assert region_scores.max() == 0
+    assert unmasked == 200 * 200
+
+
+def test_differences_below_the_pixel_threshold_are_ignored():
+    changed, _, _, _ = visual_diff.compare_images(blank(), blank(value=255 - 10), pixel_threshold=24)
+
+    assert not changed.any()
+
+
+def test_small_concentrated_change_fails_its_region():
+    changed, _, region_scores, _ = visual_diff.compare_images(
+        blank(), with_patch(blank(), 36, 36, 20), block=32
+    )
+
+    assert changed.sum() == 20 * 20
+    assert region_scores.shape == (7, 7)
+    assert region_scores[1, 1] == pytest.approx(20 * 20 / (32 * 32))
+    assert (region_scores > visual_diff.DEFAULT_REGION_THRESHOLD).sum() == 1
+
+
+def test_masked_change_is_ignored():
+    changed, _, region_scores, unmasked = visual_diff.compare_images(
+        blank(), with_patch(blank(), 40, 40, 16), block=32, ignore=[[32, 32, 32, 32]]
+    )
+
+    assert not changed.any()
+    assert region_scores[1, 1] == 0
+    assert unmasked == 200 * 200 - 32 * 32
+
+
+def test_extra_height_counts_as_changed():
+    changed, diff, _, unmasked = visual_diff.compare_images(blank(), blank(height=220))
+
+    assert changed.shape == (220, 200)
+    assert changed[200:].all() and not changed[:200].any()
+    assert (diff[200:] == 255).all()
+    assert unmasked == 220 * 200
+
+
+def test_masks_match_by_glob_pattern():
+    masks = {"*/01_page_loaded.png": [[0, 0, 1280, 80]], "*": [[1100, 0, 180, 40]], "webkit/*": [[0, 0, 1, 1]]}
+
+    assert visual_diff.masks_for(SCREENSHOT, masks) == [[0, 0, 1280, 80], [1100, 0, 180, 40]]
+    assert visual_diff.masks_for("chromium/01_Login_And_Add_Todo/02_added.png", masks) == [[1100, 0, 180, 40]]
+
+
+def test_compare_runs_reports_each_status(tmp_path):
+    baseline_dir = str(tmp_path / "baseline")
+    run_dir = str(tmp_path / "run")
+    changed = "chromium/01_Login_And_Add_Todo/02_todo_added.png"
+    save(baseline_dir, SCREENSHOT, blank())
+    save(baseline_dir, changed, blank())
+    save(baseline_dir, "chromium/02_Logout/01_logged_out.png", blank())
+    save(run_dir, SCREENSHOT, blank())
+    save(run_dir, changed, with_patch(blank(), 40, 40, 16))
+    save(run_dir, "chromium/03_New/01_new.png", blank())
+
+    summary = visual_diff.compare_runs(baseline_dir, run_dir, workers=1)
+
+    statuses = {result["path"]: result["status"] for result in summary["results"]}
+    assert statuses == {
+        SCREENSHOT: "pass",
+        changed: "fail",
+        "chromium/02_Logout/01_logged_out.png": "missing",
+        "chromium/03_New/01_new.png": "new",
+    }
+    assert summary["counts"] == {"pass": 1, "fail": 1, "missing": 1, "new": 1}
+    output_dir = os.path.join(run_dir, visual_diff.OUTPUT_DIR_NAME)
+    assert os.path.exists(os.path.join(output_dir, "heatmaps", changed))
+    assert os.path.exists(os.path.join(output_dir, "summary.json"))
+    assert os.path.exists(os.path.join(output_dir, "summary.html"))
+
+    masks = {"*/02_todo_added.png": [[32, 32, 32, 32]]}
+    summary = visual_diff.compare_runs(baseline_dir, run_dir, masks=masks, workers=1)
+    assert {result["path"]: result["status"] for result in summary["results"]}[changed] == "pass"
+
+
+def test_retried_tests_compare_their_final_attempt(tmp_path):
+    baseline_dir = str(tmp_path / "baseline")
+    run_dir = str(tmp_path / "run")
+    save(baseline_dir, SCREENSHOT, blank())
+    save(run_dir, SCREENSHOT, with_patch(blank(), 0, 0, 50))
+    save(run_dir, SCREENSHOT.replace("01_page_loaded", "attempt_3/01_page_loaded"), blank())
+    save(run_dir, SCREENSHOT.replace("01_page_loaded", "attempt_2/01_page_loaded"), with_patch(blank(), 0, 0, 50))
+
+    assert visual_diff.find_screenshots(run_dir) == {
+        SCREENSHOT: SCREENSHOT.replace("01_page_loaded", "attempt_3/01_page_loaded"),
+    }
+    summary = visual_diff.compare_runs(baseline_dir, run_dir, workers=1)
+    assert summary["counts"] == {"pass": 1}
+
+    approved = str(tmp_path / "approved")
+    visual_diff.approve(run_dir, approved)
+    assert visual_diff.find_screenshots(approved) == {SCREENSHOT: SCREENSHOT}
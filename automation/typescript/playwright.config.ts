@@ -10,7 +10,12 @@ export default defineConfig({
   forbidOnly: !!process.env.CI,
   retries: process.env.CI ? 2 : 0,
   workers: process.env.CI ? 1 : undefined,
-  reporter: [['html', { outputFolder: 'playwright-report' }], ['list']],
+  reporter: [
+    ['html', { outputFolder: 'playwright-report' }],
+    ['list'],
+    // Read by automation/aggregate_results.py
+    ['junit', { outputFile: 'results/junit.xml' }],
+  ],
   
   // Generate visual report after all tests complete
   globalTeardown: require.resolve('./global-teardown'),
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""Visual regression of step screenshots against an approved baseline.
+
+Screenshots are compared by relative path, e.g.
+`chromium/01_Login_And_Add_Todo/01_page_loaded.png` (a retried test is
+compared by its final `attempt_N/` screenshots), using NumPy:
+
+    - per-pixel: a pixel changed if any channel differs by more than
+      `pixel_threshold` (0-255)
+    - image: fails if the changed share of unmasked pixels exceeds `tolerance`
+    - regions: the image is split into `block` x `block` tiles; fails if any
+      tile has more than `region_threshold` of its pixels changed, so a small
+      but concentrated change is not averaged away on a full-page capture
+
+Ignore masks are rectangles per glob pattern in a JSON file:
+
+    {"*/01_page_loaded.png": [[0, 0, 1280, 80]], "*": [[1100, 0, 180, 40]]}
+
+Comparisons run in a process pool. Heatmaps for changed images and
+summary.json / summary.html are written to `<current>/visual-diff/`.
+
+Usage:
+    python visual_diff.py approve RUN_DIR [--baseline DIR]
+    python visual_diff.py compare BASELINE_DIR RUN_DIR [--tolerance 0.001] [--masks masks.json]
+
+Requires numpy and Pillow.
+"""
+
+import argparse
+import filecmp
+import fnmatch
+import html
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+BASELINE_DIR_NAME = "visual-baseline"
+OUTPUT_DIR_NAME = "visual-diff"
+
+# Folders never compared (diff output, pytest failure screenshots)
+SKIPPED_DIRS = (OUTPUT_DIR_NAME, "failures")
+
+# Screenshots of retried attempts: <test>/attempt_2/
+ATTEMPT_DIR = re.compile(r"^attempt_(\d+)$")
+
+DEFAULT_PIXEL_THRESHOLD = 24
+DEFAULT_TOLERANCE = 0.001
+DEFAULT_BLOCK = 32
+DEFAULT_REGION_THRESHOLD = 0.25
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Visual diff requires numpy and Pillow: pip install numpy Pillow")
+
+
+def find_screenshots(root):
+    """PNGs under root (skipping SKIPPED_DIRS) as {compared path: file path}.
+
+    Both paths are relative to root. Retried tests keep later attempts in
+    `<test>/attempt_N/`; only the final attempt is compared, under the test
+    folder's own paths.
+    """
+    screenshots = {}
+
+    def add(dirpath, compared_dir):
+        for filename in sorted(os.listdir(dirpath)):
+            if filename.lower().endswith(".png"):
+                compared = os.path.relpath(os.path.join(compared_dir, filename), root).replace(os.sep, "/")
+                actual = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, "/")
+                screenshots[compared] = actual
+
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS)
+        attempts = [d for d in dirnames if ATTEMPT_DIR.match(d)]
+        if attempts:
+            dirnames[:] = [d for d in dirnames if d not in attempts]
+            final = max(attempts, key=lambda d: int(ATTEMPT_DIR.match(d).group(1)))
+            add(os.path.join(dirpath, final), dirpath)
+        else:
+            add(dirpath, dirpath)
+    return screenshots
+
+
+def load_masks(path):
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def masks_for(rel_path, masks):
+    """Ignore rectangles [x, y, w, h] that apply to one screenshot."""
+    rects = []
+    for pattern, pattern_rects in masks.items():
+        if fnmatch.fnmatch(rel_path, pattern):
+            rects.extend(pattern_rects)
+    return rects
+
+
+def _load_rgb(path):
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _pad(image, height, width):
+    return np.pad(image, ((0, height - image.shape[0]), (0, width - image.shape[1]), (0, 0)))
+
+
+def compare_images(baseline, current, pixel_threshold=DEFAULT_PIXEL_THRESHOLD,
+                   block=DEFAULT_BLOCK, ignore=()):
+    """Compare two RGB arrays.
+
+    Returns (changed, diff, region_scores, unmasked): a boolean mask of
+    changed pixels, the per-pixel max channel difference, the changed share
+    per block x block tile and the number of unmasked pixels.
+    """
+    height = max(baseline.shape[0], current.shape[0])
+    width = max(baseline.shape[1], current.shape[1])
+
+    # Full-page captures differ in height when content grows; area present
+    # in only one image counts as changed
+    outside = np.ones((height, width), dtype=bool)
+    outside[:min(baseline.shape[0], current.shape[0]), :min(baseline.shape[1], current.shape[1])] = False
+
+    diff = np.abs(
+        _pad(baseline, height, width).astype(np.int16) - _pad(current, height, width).astype(np.int16)
+    ).max(axis=2)
+    changed = (diff > pixel_threshold) | outside
+    diff[outside] = 255
+
+    valid = np.ones((height, width), dtype=bool)
+    for x, y, w, h in ignore:
+        valid[max(0, y):y + h, max(0, x):x + w] = False
+    changed &= valid
+
+    # Tile scores: pad to whole blocks, then mean over each block x block tile
+    rows = -(-height // block)
+    cols = -(-width // block)
+    tiles = np.zeros((rows * block, cols * block), dtype=np.float32)
+    tiles[:height, :width] = changed
+    tile_valid = np.zeros_like(tiles)
+    tile_valid[:height, :width] = valid
+    changed_per_tile = tiles.reshape(rows, block, cols, block).sum(axis=(1, 3))
+    valid_per_tile = tile_valid.reshape(rows, block, cols, block).sum(axis=(1, 3))
+    region_scores = np.divide(changed_per_tile, valid_per_tile,
+                              out=np.zeros_like(changed_per_tile), where=valid_per_tile > 0)
+
+    return changed, diff, region_scores, int(valid.sum())
+
+
+def write_heatmap(current, changed, diff, path):
+    """Dimmed grayscale of the current image with changed pixels in red."""
+    height, width = changed.shape
+    gray = np.zeros((height, width), dtype=np.uint8)
+    gray[:current.shape[0], :current.shape[1]] = (current.mean(axis=2) * 0.4).astype(np.uint8)
+
+    heatmap = np.stack([gray, gray, gray], axis=2)
+    intensity = np.clip(diff.astype(np.uint16) * 2 + 96, 0, 255).astype(np.uint8)
+    heatmap[changed, 0] = intensity[changed]
+    heatmap[changed, 1] = 0
+    heatmap[changed, 2] = 0
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(heatmap).save(path, optimize=False, compress_level=1)
+
+
+def _compare_job(job):
+    """Worker: compare one screenshot pair (runs in the process pool)."""
+    rel_path, baseline_path, current_path, heatmap_path, options = job
+    result = {"path": rel_path, "changed_ratio": 0.0, "failed_regions": 0, "heatmap": None}
+
+    if not os.path.exists(current_path):
+        result["status"] = "missing"
+        return result
+    if not os.path.exists(baseline_path):
+        result["status"] = "new"
+        return result
+    if filecmp.cmp(baseline_path, current_path, shallow=False):
+        result["status"] = "pass"
+        return result
+
+    baseline = _load_rgb(baseline_path)
+    current = _load_rgb(current_path)
+    changed, diff, region_scores, unmasked = compare_images(
+        baseline, current, options["pixel_threshold"], options["block"], options["ignore"]
+    )
+
+    result["changed_ratio"] = float(changed.sum()) / max(1, unmasked)
+    result["failed_regions"] = int((region_scores > options["region_threshold"]).sum())
+    result["size"] = {"baseline": list(baseline.shape[:2]), "current": list(current.shape[:2])}
+    failed = result["changed_ratio"] > options["tolerance"] or result["failed_regions"] > 0
+    result["status"] = "fail" if failed else "pass"
+
+    if failed:
+        write_heatmap(current, changed, diff, heatmap_path)
+        result["heatmap"] = "heatmaps/" + rel_path
+    return result
+
+
+def compare_runs(baseline_dir, current_dir, tolerance=DEFAULT_TOLERANCE,
+                 pixel_threshold=DEFAULT_PIXEL_THRESHOLD, block=DEFAULT_BLOCK,
+                 region_threshold=DEFAULT_REGION_THRESHOLD, masks=None, workers=None):
+    """Compare every screenshot of current_dir with baseline_dir.
+
+    Writes heatmaps and summary.json/summary.html to current_dir/visual-diff/
+    and returns the summary dict.
+    """
+    require_numpy()
+    masks = masks or {}
+    output_dir = os.path.join(current_dir, OUTPUT_DIR_NAME)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+
+    baseline_files = find_screenshots(baseline_dir)
+    current_files = find_screenshots(current_dir)
+    paths = sorted(set(baseline_files) | set(current_files))
+    jobs = [
+        (
+            rel_path,
+            os.path.join(baseline_dir, baseline_files.get(rel_path, rel_path)),
+            os.path.join(current_dir, current_files.get(rel_path, rel_path)),
+            os.path.join(output_dir, "heatmaps", rel_path),
+            {
+                "pixel_threshold": pixel_threshold,
+                "block": block,
+                "tolerance": tolerance,
+                "region_threshold": region_threshold,
+                "ignore": masks_for(rel_path, masks),
+            },
+        )
+        for rel_path in paths
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_compare_job, jobs, chunksize=chunksize))
+    else:
+        results = [_compare_job(job) for job in jobs]
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+    summary = {
+        "baseline": os.path.abspath(baseline_dir),
+        "current": os.path.abspath(current_dir),
+        "options": {
+            "tolerance": tolerance,
+            "pixel_threshold": pixel_threshold,
+            "block": block,
+            "region_threshold": region_threshold,
+        },
+        "counts": counts,
+        "results": results,
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    write_summary_html(summary, os.path.join(output_dir, "summary.html"))
+    return summary
+
+
+def write_summary_html(summary, path):
+    """Visual diff report listing non-passing screenshots with their heatmaps."""
+    rows = ""
+    for result in summary["results"]:
+        if result["status"] == "pass":
+            continue
+        heatmap = (
+            f'<a href="{html.escape(result["heatmap"])}" target="_blank">'
+            f'<img src="{html.escape(result["heatmap"])}" width="320"/></a>'
+            if result["heatmap"] else ""
+        )
+        rows += (
+            f'<tr class="{result["status"]}"><td>{html.escape(result["path"])}</td>'
+            f'<td>{result["status"].upper()}</td><td>{result["changed_ratio"]:.3%}</td>'
+            f'<td>{result["failed_regions"]}</td><td>{heatmap}</td></tr>\n'
+        )
+
+    counts = ", ".join(f"{count} {status}" for status, count in sorted(summary["counts"].items()))
+    content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Visual Diff - {html.escape(os.path.basename(summary['current']))}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; padding: 20px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        td, th {{ border: 1px solid #e0e0e0; padding: 8px; text-align: left; }}
+        tr.fail td:nth-child(2) {{ color: #d32f2f; font-weight: bold; }}
+        tr.missing td:nth-child(2), tr.new td:nth-child(2) {{ color: #f57c00; }}
+    </style>
+</head>
+<body>
+    <h1>Visual Diff</h1>
+    <p>Baseline: {html.escape(summary['baseline'])}</p>
+    <p>Current: {html.escape(summary['current'])}</p>
+    <p><strong>{counts or 'No screenshots'}</strong></p>
+    <table>
+        <tr><th>Screenshot</th><th>Status</th><th>Changed</th><th>Failed regions</th><th>Heatmap</th></tr>
+        {rows or '<tr><td colspan="5">All screenshots match the baseline</td></tr>'}
+    </table>
+</body>
+</html>"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def approve(run_dir, baseline_dir):
+    """Make a run's screenshots the new baseline."""
+    if os.path.isdir(baseline_dir):
+        shutil.rmtree(baseline_dir)
+    for rel_path, source in find_screenshots(run_dir).items():
+        target = os.path.join(baseline_dir, rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(run_dir, source), target)
+
+
+def report_path(framework_dir, run_dir):
+    """Where check_latest_run will write the run's summary.html, or None without a baseline."""
+    if not os.path.isdir(os.path.join(framework_dir, BASELINE_DIR_NAME)):
+        return None
+    return os.path.join(run_dir, OUTPUT_DIR_NAME, "summary.html")
+
+
+def check_latest_run(framework_dir, run_dir):
+    """Compare a run against <framework_dir>/visual-baseline if one was approved.
+
+    Returns the summary, or None when there is no baseline or numpy is missing.
+    """
+    baseline_dir = os.path.join(framework_dir, BASELINE_DIR_NAME)
+    if not os.path.isdir(baseline_dir) or run_dir is None:
+        return None
+    if np is None:
+        print("Visual diff skipped: pip install numpy Pillow")
+        return None
+
+    masks_path = os.path.join(framework_dir, "visual-masks.json")
+    masks = load_masks(masks_path) if os.path.exists(masks_path) else {}
+    tolerance = float(os.environ.get("VISUAL_TOLERANCE", DEFAULT_TOLERANCE))
+    return compare_runs(baseline_dir, run_dir, tolerance=tolerance, masks=masks)
+
+
+def _cmd_compare(args):
+    summary = compare_runs(
+        args.baseline, args.current, args.tolerance, args.pixel_threshold,
+        args.block, args.region_threshold, load_masks(args.masks), args.workers,
+    )
+    counts = summary["counts"]
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "No screenshots")
+    print(f"Report: {os.path.join(args.current, OUTPUT_DIR_NAME, 'summary.html')}")
+    return 1 if counts.get("fail") or counts.get("missing") else 0
+
+
+def _cmd_approve(args):
+    baseline_dir = args.baseline or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(args.run_dir))), BASELINE_DIR_NAME
+    )
+    approve(args.run_dir, baseline_dir)
+    print(f"Baseline updated: {baseline_dir}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare step screenshots against a baseline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compare = subparsers.add_parser("compare", help="Compare a run with a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                         help="Allowed share of changed pixels per image")
+    compare.add_argument("--pixel-threshold", type=int, default=DEFAULT_PIXEL_THRESHOLD,
+                         help="Per-channel difference (0-255) that counts as changed")
+    compare.add_argument("--block", type=int, default=DEFAULT_BLOCK, help="Region tile size in pixels")
+    compare.add_argument("--region-threshold", type=float, default=DEFAULT_REGION_THRESHOLD,
+                         help="Allowed share of changed pixels per tile")
+    compare.add_argument("--masks", help="JSON of ignore rectangles per glob pattern")
+    compare.add_argument("--workers", type=int, help="Process pool size (default: CPU count)")
+    compare.set_defaults(func=_cmd_compare)
+
+    approve_cmd = subparsers.add_parser("approve", help="Use a run's screenshots as the baseline")
+    approve_cmd.add_argument("run_dir")
+    approve_cmd.add_argument("--baseline", help="Baseline folder (default: <framework>/visual-baseline)")
+    approve_cmd.set_defaults(func=_cmd_approve)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except RuntimeError as e:
+        print(e)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Watch mode: re-run changed tests on save in a long-lived process.
+
+The Playwright driver and the browser stay warm between runs (see
+browser_pool.py):
+
+    robot    runs in-process (`robot.run_cli`), so the interpreter and the
+             robot/playwright imports stay warm too. Robot supports repeated
+             programmatic runs; the library cache (IMPORTER) is reset and the
+             framework's modules are purged before each run, so every run
+             gets fresh library instances and module globals (WARM_BROWSER=1).
+    pytest   runs in a subprocess per change: pytest.main() must not be
+             called twice in one process (plugins, conftest globals such as
+             RETRY_FAILED and fixtures would leak between runs). The tests
+             attach to the daemon's Chromium over CDP (WARM_BROWSER_CDP).
+
+Files are polled for changes; on save only the affected tests are re-run:
+
+    .robot file          changed test cases (whole file if settings,
+                         variables or keywords changed)
+    test_*.py            changed test functions (whole class / file if
+                         fixtures or module-level code changed)
+    other .py files      everything (libraries, conftest, automation helpers)
+
+Usage (from the framework folder, with its venv active):
+    python ../../watch_daemon.py robot [robot options...]
+    python ../../watch_daemon.py pytest [pytest options...]
+"""
+
+import argparse
+import ast
+import hashlib
+import os
+import subprocess
+import sys
+import time
+
+import browser_pool
+import browser_profiles
+import retention
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FRAMEWORK_DIRS = {
+    "robot": os.path.join(SCRIPT_DIR, "python", "robotframework"),
+    "pytest": os.path.join(SCRIPT_DIR, "python", "playwright"),
+}
+
+# Pool state must survive module purges
+KEEP_MODULES = ("browser_pool",)
+
+SKIPPED_DIRS = ("venv", ".venv", "__pycache__", "test-output", "results", "node_modules", "benchmarks")
+
+DEFAULT_INTERVAL = 0.3
+
+
+def _digest(*parts):
+    sha = hashlib.sha1()
+    for part in parts:
+        sha.update(part.encode("utf-8"))
+    return sha.hexdigest()
+
+
+def robot_test_hashes(path):
+    """Hash each test case block of a .robot file.
+
+    The "" key covers everything outside the test cases (settings,
+    variables, keywords); when it changes every test of the file is affected.
+    """
+    blocks = {"": []}
+    in_tests = False
+    current = ""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip()
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+
+            if stripped.startswith("***"):
+                header = stripped.strip("* ").lower()
+                in_tests = header.startswith(("test case", "task"))
+                current = ""
+                blocks[""].append(stripped)
+                continue
+
+            if in_tests and not line[0].isspace():
+                current = stripped
+                blocks.setdefault(current, [])
+                continue
+
+            blocks[current if in_tests else ""].append(line)
+
+    return {name: _digest(*lines) for name, lines in blocks.items()}
+
+
+def python_test_hashes(path):
+    """Hash each test function of a test module (formatting and comments ignored).
+
+    Keys are pytest node id suffixes (test_x, TestClass::test_x); the "" key
+    covers module-level code (imports, fixtures, helpers). Test methods
+    include the hash of their class' other members (fixtures, attributes).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    def is_test(node):
+        return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")
+
+    hashes = {}
+    module_rest = []
+    for node in tree.body:
+        if is_test(node):
+            hashes[node.name] = _digest(ast.dump(node))
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            class_rest = [ast.dump(decorator) for decorator in node.decorator_list]
+            class_rest += [ast.dump(item) for item in node.body if not is_test(item)]
+            class_hash = _digest(*class_rest)
+            for item in node.body:
+                if is_test(item):
+                    hashes[f"{node.name}::{item.name}"] = _digest(class_hash, ast.dump(item))
+        else:
+            module_rest.append(ast.dump(node))
+
+    hashes[""] = _digest(*module_rest)
+    return hashes
+
+
+def changed_tests(old, new):
+    """Names of the tests that differ between two hash maps, or None for all."""
+    if old.get("") != new.get(""):
+        return None
+    return sorted(name for name, digest in new.items() if name and old.get(name) != digest)
+
+
+class WatchDaemon:
+    """Polls a framework folder and re-runs affected tests."""
+
+    def __init__(self, framework, extra_args=None, interval=DEFAULT_INTERVAL):
+        self.framework = framework
+        self.dir_path = FRAMEWORK_DIRS[framework]
+        self.extra_args = extra_args or []
+        self.interval = interval
+        self.mtimes = {}
+        self.hashes = {}
+
+    def is_test_file(self, path):
+        name = os.path.basename(path)
+        if self.framework == "robot":
+            return name.endswith(".robot")
+        return name.startswith("test_") and name.endswith(".py")
+
+    def test_hashes(self, path):
+        try:
+            if self.framework == "robot":
+                return robot_test_hashes(path)
+            return python_test_hashes(path)
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            # Half-saved file: treat as a whole-file change
+            return {}
+
+    def watched_files(self):
+        """Test files and Python sources of the framework and the shared helpers."""
+        files = []
+        for root, dirs, names in os.walk(self.dir_path):
+            dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS and not d.startswith(".")]
+            for name in names:
+                path = os.path.join(root, name)
+                if name.endswith(".py") or self.is_test_file(path):
+                    files.append(path)
+
+        for name in os.listdir(SCRIPT_DIR):
+            if name.endswith(".py"):
+                files.append(os.path.join(SCRIPT_DIR, name))
+        return files
+
+    def scan(self):
+        """Return the files added, modified or removed since the last scan."""
+        mtimes = {}
+        for path in self.watched_files():
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                continue
+
+        changed = [path for path, mtime in mtimes.items() if self.mtimes.get(path) != mtime]
+        changed += [path for path in self.mtimes if path not in mtimes]
+        self.mtimes = mtimes
+        return changed
+
+    def plan(self, changed):
+        """Work out what to run: None for everything, else {test file: [tests] or None}."""
+        selection = {}
+        run_all = False
+        for path in changed:
+            if not self.is_test_file(path):
+                run_all = True
+                continue
+
+            if not os.path.exists(path):
+                self.hashes.pop(path, None)
+                continue
+
+            new = self.test_hashes(path)
+            tests = changed_tests(self.hashes.get(path, {}), new)
+            self.hashes[path] = new
+            if tests is None or tests:
+                selection[path] = tests
+        return None if run_all else selection
+
+    def purge_modules(self, changed):
+        """Forget imported modules of the framework folder and changed files."""
+        paths = {os.path.abspath(path) for path in changed}
+        for name, module in list(sys.modules.items()):
+            filename = getattr(module, "__file__", None)
+            if not filename or name in KEEP_MODULES:
+                continue
+            filename = os.path.abspath(filename)
+            if filename in paths or filename.startswith(self.dir_path + os.sep):
+                del sys.modules[name]
+
+    def run_robot(self, selection):
+        import robot
+
+        # Global libraries are cached between runs; re-import them fresh
+        try:
+            from robot.running.namespace import IMPORTER
+            IMPORTER.reset()
+        except (ImportError, AttributeError):
+            pass
+
+        args = ["--outputdir", "results", *self.extra_args]
+        if selection is None:
+            return robot.run_cli(args + ["tests"], exit=False)
+        
+        # --test applies to all sources, so a whole-file change runs every selected file fully
+        if all(tests is not None for tests in selection.values()):
+            for tests in selection.values():
+                for test in tests:
+                    args += ["--test", test]
+        return robot.run_cli(args + sorted(selection), exit=False)
+
+    def pytest_browsers(self):
+        """Browsers requested with --browser (pytest-playwright defaults to chromium)."""
+        browsers = []
+        for i, arg in enumerate(self.extra_args):
+            if arg == "--browser" and i + 1 < len(self.extra_args):
+                browsers.append(self.extra_args[i + 1])
+            elif arg.startswith("--browser="):
+                browsers.append(arg.split("=", 1)[1])
+        return browsers or ["chromium"]
+
+    def pytest_env(self):
+        """Environment of the pytest subprocess: the warm Chromium's CDP endpoint."""
+        env = dict(os.environ)
+        if "chromium" not in self.pytest_browsers():
+            return env
+
+        try:
+            profile = browser_profiles.get_profile()
+        except ValueError:
+            return env  # pytest reports the invalid profile
+        launch_args = {"headless": "--headed" not in self.extra_args,
+                       **browser_profiles.launch_args(profile, "chromium")}
+        env[browser_pool.CDP_ENDPOINT_ENV] = browser_pool.get_cdp_endpoint(launch_args)
+        return env
+
+    def run_pytest(self, selection):
+        if selection is None:
+            node_ids = []
+        else:
+            node_ids = []
+            for path, tests in sorted(selection.items()):
+                rel_path = os.path.relpath(path, self.dir_path)
+                node_ids += [rel_path] if tests is None else [f"{rel_path}::{test}" for test in tests]
+        command = [sys.executable, "-m", "pytest", "-v", *self.extra_args, *node_ids]
+        return subprocess.run(command, cwd=self.dir_path, env=self.pytest_env()).returncode
+
+    def run(self, selection, changed=()):
+        """Run the selected tests and print how long it took."""
+        if selection is None:
+            print("\n▶ Running all tests")
+        else:
+            for path, tests in sorted(selection.items()):
+                print(f"\n▶ {os.path.relpath(path, self.dir_path)}: {', '.join(tests) if tests else 'all tests'}")
+
+        if self.framework == "robot":
+            self.purge_modules(changed)
+        started = time.monotonic()
+        try:
+            if self.framework == "robot":
+                rc = self.run_robot(selection)
+            else:
+                rc = self.run_pytest(selection)
+        except Exception as e:
+            print(f"\n✗ Run failed: {e}")
+            rc = 1
+        elapsed = time.monotonic() - started
+
+        retention.apply_retention(os.path.join(self.dir_path, "test-output"), **retention.policy_from_env())
+        status = "✓ passed" if rc == 0 else f"✗ failed (rc={rc})"
+        print(f"\n{status} in {elapsed:.1f}s — watching for changes (Ctrl+C to stop)")
+
+    def watch(self, initial_run=True):
+        os.chdir(self.dir_path)
+        if self.dir_path not in sys.path:
+            sys.path.insert(0, self.dir_path)
+        if self.framework == "robot":
+            os.environ["WARM_BROWSER"] = "1"
+
+        self.scan()
+        for path in self.mtimes:
+            if self.is_test_file(path):
+                self.hashes[path] = self.test_hashes(path)
+        if initial_run:
+            self.run(None)
+
+        while True:
+            time.sleep(self.interval)
+            changed = self.scan()
+            if not changed:
+                continue
+
+            # Let editors finish writing (save = truncate + write, or rename)
+            time.sleep(self.interval)
+            changed = sorted(set(changed + self.scan()))
+            selection = self.plan(changed)
+            if selection == {}:
+                continue
+            self.run(selection, changed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run changed tests on save with a warm browser.")
+    parser.add_argument("framework", choices=sorted(FRAMEWORK_DIRS))
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Polling interval in seconds")
+    parser.add_argument("--no-initial-run", action="store_true", help="Wait for a change before the first run")
+    args, extra_args = parser.parse_known_args(argv)
+
+    daemon = WatchDaemon(args.framework, extra_args, args.interval)
+    try:
+        daemon.watch(initial_run=not args.no_initial_run)
+    except KeyboardInterrupt:
+        print("\nStopping watch mode")
+    finally:
+        browser_pool.close_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())